@@ -0,0 +1,189 @@
+import argparse
+import base64
+import json
+import os
+import sys
+import timeit
+from typing import Callable, Dict, List
+
+from algosdk import account, encoding
+from algosdk.future import transaction as algo_txn
+from algosdk.v2client import algod
+from pyteal import compileTeal, Mode
+
+from src.app_pyteal.algo_delegate_authority import algo_delegate_authority_logic
+from src.app_pyteal.app_source_code import approval_program
+from src.app_pyteal.asa_delegate_authority import asa_delegate_authority_logic
+from src.app_services.app_interaction_service import AppInteractionService
+from src.app_utils.account_factory import plan_funding
+from src.app_utils.app_artifacts import AppArtifact
+from src.app_utils.keyring import sign_transaction
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+APP_ID = 1000
+ASA_ID = 2000
+TEAL_VERSION = 3
+
+# Valid TEAL v3 programs, "pushint 1" and "pushint 2", that stand in for the compiled delegate authorities since
+# compiling the real ones needs a node.
+ASA_DELEGATE_AUTHORITY_CODE_BYTES = bytes([TEAL_VERSION, 0x81, 0x01])
+ALGO_DELEGATE_AUTHORITY_CODE_BYTES = bytes([TEAL_VERSION, 0x81, 0x02])
+
+
+class Benchmark:
+
+    def __init__(self, name: str, function: Callable):
+        """
+        :param name: The name under which the result is reported and stored in the baseline.
+        :param function: The measured function, called without arguments.
+        """
+        self.name = name
+        self.function = function
+
+    def run(self, repeat: int) -> float:
+        """
+        Calls the function in batches that take at least 0.2 seconds.
+        :param repeat: Number of batches.
+        :return:
+            The duration of a single call in seconds, from the fastest batch.
+        """
+        timer = timeit.Timer(self.function)
+        number, _ = timer.autorange()
+        return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def _suggested_params() -> algo_txn.SuggestedParams:
+    return algo_txn.SuggestedParams(fee=1000,
+                                    first=10000,
+                                    last=11000,
+                                    gh="SGO1GKSzyE7IEPItTxCByw9x8FmnrCDexi9/cOUJOiI=",
+                                    gen="testnet-v1.0",
+                                    flat_fee=True)
+
+
+def create_benchmarks() -> List[Benchmark]:
+    """
+    :return:
+        The benchmarks of the CPU side work of a bidding: compiling the PyTeal programs, building, grouping, signing
+        and encoding the transactions. None of them talks to a node.
+    """
+    params = _suggested_params()
+    owner_private_key, owner_address = account.generate_account()
+    bidder_private_key, bidder_address = account.generate_account()
+    receiver_addresses = [account.generate_account()[1] for _ in range(256)]
+
+    artifact = AppArtifact(app_id=APP_ID,
+                           asa_id=ASA_ID,
+                           teal_version=TEAL_VERSION,
+                           approval_program_hash="",
+                           asa_delegate_authority_code_bytes=ASA_DELEGATE_AUTHORITY_CODE_BYTES,
+                           algo_delegate_authority_code_bytes=ALGO_DELEGATE_AUTHORITY_CODE_BYTES)
+
+    app_interaction_service = AppInteractionService(app_id=APP_ID,
+                                                    asa_id=ASA_ID,
+                                                    current_owner_address=owner_address,
+                                                    current_highest_bid=1000000,
+                                                    teal_version=TEAL_VERSION,
+                                                    artifact=artifact,
+                                                    client=algod.AlgodClient("", "http://localhost"))
+
+    def build_bidding_group():
+        return app_interaction_service.build_bidding_group(bidder_private_key=bidder_private_key,
+                                                           bidder_address=bidder_address,
+                                                           amount=2000000,
+                                                           params=params)
+
+    def payments(count: int) -> List[algo_txn.Transaction]:
+        return [algo_txn.PaymentTxn(sender=bidder_address, sp=params, receiver=receiver_address, amt=1000)
+                for receiver_address in receiver_addresses[:count]]
+
+    payment_txn = payments(1)[0]
+    payments_4 = payments(4)
+    payments_16 = payments(16)
+    bidding_group = build_bidding_group()
+
+    def encode_signed_group():
+        return b''.join(base64.b64decode(encoding.msgpack_encode(signed_txn)) for signed_txn in bidding_group)
+
+    return [
+        Benchmark('compile_approval_program',
+                  lambda: compileTeal(approval_program(), mode=Mode.Application, version=TEAL_VERSION)),
+        Benchmark('compile_asa_delegate_authority',
+                  lambda: compileTeal(asa_delegate_authority_logic(app_id=APP_ID, asa_id=ASA_ID),
+                                      mode=Mode.Signature, version=TEAL_VERSION)),
+        Benchmark('compile_algo_delegate_authority',
+                  lambda: compileTeal(algo_delegate_authority_logic(app_id=APP_ID),
+                                      mode=Mode.Signature, version=TEAL_VERSION)),
+        Benchmark('build_bidding_group', build_bidding_group),
+        Benchmark('calculate_group_id_4', lambda: algo_txn.calculate_group_id(payments_4)),
+        Benchmark('calculate_group_id_16', lambda: algo_txn.calculate_group_id(payments_16)),
+        Benchmark('sign_transaction_algosdk', lambda: payment_txn.sign(bidder_private_key)),
+        Benchmark('sign_transaction_keyring', lambda: sign_transaction(payment_txn, bidder_private_key)),
+        Benchmark('encode_signed_bidding_group', encode_signed_group),
+        Benchmark('plan_funding_256', lambda: plan_funding(funder_address=owner_address,
+                                                           receiver_addresses=receiver_addresses,
+                                                           amount=1000000,
+                                                           params=params)),
+    ]
+
+
+def compare(results: Dict[str, float], baseline: Dict[str, float], threshold: float) -> List[str]:
+    """
+    Prints the results next to the baseline.
+    :param results: Seconds per call of every benchmark.
+    :param baseline: Seconds per call of every benchmark in the baseline.
+    :param threshold: The ratio to the baseline above which a benchmark is reported as a regression.
+    :return:
+        The names of the regressed benchmarks.
+    """
+    regressions = []
+
+    print(f"{'benchmark':<34}{'current':>14}{'baseline':>14}{'ratio':>9}")
+    for name, seconds in results.items():
+        baseline_seconds = baseline.get(name)
+        if baseline_seconds is None:
+            print(f"{name:<34}{seconds * 1e6:>12.1f}us{'-':>14}{'-':>9}")
+            continue
+
+        ratio = seconds / baseline_seconds
+        is_regression = ratio > threshold
+        if is_regression:
+            regressions.append(name)
+
+        print(f"{name:<34}{seconds * 1e6:>12.1f}us{baseline_seconds * 1e6:>12.1f}us{ratio:>8.2f}x"
+              f"{'  REGRESSION' if is_regression else ''}")
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks the CPU side hot paths of the bidding application.')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='Location of the baseline file.')
+    parser.add_argument('--save-baseline', action='store_true', help='Stores the results as the new baseline.')
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help='Ratio to the baseline above which a benchmark is reported as a regression.')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of measured batches per benchmark.')
+    parser.add_argument('--filter', default='', help='Only runs the benchmarks whose name contains this text.')
+    args = parser.parse_args()
+
+    results = {benchmark.name: benchmark.run(repeat=args.repeat)
+               for benchmark in create_benchmarks() if args.filter in benchmark.name}
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+
+    regressions = compare(results=results, baseline=baseline, threshold=args.threshold)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as file:
+            json.dump({**baseline, **results}, file, indent=2, sort_keys=True)
+        return 0
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,208 @@
+import json
+import socket
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, List
+
+from algosdk import error as algo_error
+from algosdk.v2client import algod
+
+from src.app_utils.algod_client_pool import AlgodClientPool
+
+
+class StandInNode:
+
+    def __init__(self, name: str, last_round: int, delay: float = 0.0):
+        """
+        Local HTTP server that answers the algod requests of the AlgodClientPool like a node would, and counts them.
+        :param name: The name of the node in the reports.
+        :param last_round: The round that the node reports.
+        :param delay: Seconds that the node waits before every response.
+        """
+        self.name = name
+        self.last_round = last_round
+        self.delay = delay
+
+        # Number of the following requests that are answered with a 503.
+        self.failures = 0
+        # Status code and message of the answer to a submission.
+        self.submit_error = None
+
+        self.lock = threading.Lock()
+        self.reads = 0
+        self.submissions = []
+
+        node = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                node._handle(self, body=None)
+
+            def do_POST(self):
+                node._handle(self, body=self.rfile.read(int(self.headers['Content-Length'])))
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.address = f'http://127.0.0.1:{self.server.server_address[1]}'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def _handle(self, handler: BaseHTTPRequestHandler, body):
+        time.sleep(self.delay)
+
+        with self.lock:
+            if body is None:
+                self.reads += 1
+            else:
+                self.submissions.append(body)
+
+            if self.failures > 0:
+                self.failures -= 1
+                return _respond(handler, 503, {'message': 'unavailable'})
+
+        if body is not None:
+            if self.submit_error is not None:
+                return _respond(handler, self.submit_error[0], {'message': self.submit_error[1]})
+            return _respond(handler, 200, {'txId': 'TXID'})
+
+        if handler.path == '/v2/status':
+            return _respond(handler, 200, {'last-round': self.last_round})
+
+        return _respond(handler, 404, {'message': 'not found'})
+
+    def client(self) -> algod.AlgodClient:
+        return algod.AlgodClient('', self.address)
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def _respond(handler: BaseHTTPRequestHandler, status: int, response: dict):
+    body = json.dumps(response).encode()
+    handler.send_response(status)
+    handler.send_header('Content-Type', 'application/json')
+    handler.send_header('Content-Length', str(len(body)))
+    handler.end_headers()
+    handler.wfile.write(body)
+
+
+def _down_node_address() -> str:
+    # A port that was free a moment ago, so the connections to it are refused.
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return f'http://127.0.0.1:{s.getsockname()[1]}'
+
+
+def _wait_until(condition: Callable[[], bool], timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def check_client_pool() -> List[str]:
+    """
+    Runs the AlgodClientPool against a fast, a slow, a lagging and a down stand-in node and checks the routing of the
+    reads, the failover to the next node, the exclusion of the lagging and the down node, the fan-out of the
+    submissions and the measurement of the nodes of a pool that was never refreshed.
+    :return:
+        The descriptions of the failed checks.
+    """
+    fast = StandInNode('fast', last_round=100, delay=0.0)
+    slow = StandInNode('slow', last_round=100, delay=0.1)
+    # The lagging node answers fastest of all, it is excluded only because of its round.
+    lagging = StandInNode('lagging', last_round=90, delay=0.0)
+    down_address = _down_node_address()
+
+    failures = []
+
+    def check(is_passing: bool, description: str):
+        print(f"{'ok' if is_passing else 'FAILED':<8}{description}")
+        if not is_passing:
+            failures.append(description)
+
+    pool = AlgodClientPool(clients=[lagging.client(), algod.AlgodClient('', down_address), slow.client(),
+                                    fast.client()],
+                           submit_fan_out=4,
+                           max_round_lag=2,
+                           failure_cooldown_seconds=60)
+    try:
+        pool.refresh()
+        ranked = [node.client.algod_address for node in pool.ranked_nodes()]
+        check(ranked[:2] == [fast.address, slow.address],
+              'the healthy nodes are ranked by latency before the others')
+        check(set(ranked[2:]) == {lagging.address, down_address},
+              'the lagging and the down node are ranked last')
+
+        reads = (fast.reads, slow.reads, lagging.reads)
+        for _ in range(5):
+            pool.status()
+        check(fast.reads == reads[0] + 5 and (slow.reads, lagging.reads) == reads[1:],
+              'the reads go to the fastest healthy node')
+
+        fast.failures = 1
+        reads = (fast.reads, slow.reads)
+        status = pool.status()
+        check(status['last-round'] == 100 and fast.reads == reads[0] + 1 and slow.reads == reads[1] + 1,
+              'a read that fails with a 503 is retried on the next node')
+        check(pool.ranked_nodes()[0].client.algod_address == slow.address,
+              'a failed node is skipped for the cooldown')
+
+        txid = pool.send_raw_transaction('c2lnbmVk')
+        check(txid == 'TXID', 'the submission returns the txid of the first node that accepts it')
+        check(_wait_until(lambda: all(len(node.submissions) == 1 for node in (fast, slow, lagging))),
+              'the submission is sent to every node that is up')
+        check(len({bytes(node.submissions[0]) for node in (fast, slow, lagging)}) == 1,
+              'every node receives the same bytes')
+
+        for node in (fast, slow, lagging):
+            node.submit_error = (400, 'transaction rejected by logic')
+        try:
+            pool.send_raw_transaction('c2lnbmVk')
+            check(False, 'a rejection by every node is raised')
+        except algo_error.AlgodHTTPError as e:
+            check(e.code == 400 and 'rejected by logic' in str(e),
+                  'a rejection by the nodes is raised instead of the network error of the down node')
+        for node in (fast, slow, lagging):
+            node.submit_error = None
+
+        # A pool that is used right away, without a refresh, measures every node on its first use.
+        fresh_pool = AlgodClientPool(clients=[slow.client(), fast.client()], refresh_interval_seconds=0.2)
+        reads = (fast.reads, slow.reads)
+        for _ in range(10):
+            fresh_pool.status()
+        check(slow.reads - reads[1] == 1 and fast.reads - reads[0] == 9,
+              'without a refresh every node is probed once and the reads then go to the fastest one')
+
+        # The latency is a moving average, so the pool keeps being used until the refreshes have caught up.
+        slow.delay = 0.0
+        fast.delay = 0.1
+
+        def is_slow_node_preferred():
+            fresh_pool.status()
+            time.sleep(0.1)
+            return fresh_pool.ranked_nodes()[0].client.algod_address == slow.address
+
+        check(_wait_until(is_slow_node_preferred, timeout=10.0),
+              'the nodes are measured again in the background when their status gets old')
+    finally:
+        for node in (fast, slow, lagging):
+            node.close()
+
+    return failures
+
+
+def main():
+    failures = check_client_pool()
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
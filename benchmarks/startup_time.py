@@ -0,0 +1,61 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.hot_paths import APP_ID, ASA_ID, TEAL_VERSION, ASA_DELEGATE_AUTHORITY_CODE_BYTES, \
+    ALGO_DELEGATE_AUTHORITY_CODE_BYTES
+from src.app_utils.app_artifacts import AppArtifact
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = {
+    'python': 'pass',
+    'import_services': 'import src.app_services.app_initializaion_service\n'
+                       'import src.app_services.app_interaction_service',
+    'interaction_service_from_artifact': 'from src.app_services.app_interaction_service import AppInteractionService\n'
+                                         'AppInteractionService.from_artifact(artifact_path={artifact_path!r},\n'
+                                         '                                    current_owner_address="")',
+}
+
+
+def measure(code: str, runs: int) -> float:
+    """
+    :param code: The code that is executed by a new python process.
+    :param runs: Number of processes.
+    :return:
+        The median wall time of the processes in seconds.
+    """
+    durations = []
+    for _ in range(runs):
+        started_at = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], cwd=PROJECT_ROOT, check=True)
+        durations.append(time.perf_counter() - started_at)
+    return statistics.median(durations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measures the startup time of short lived processes that use the '
+                                                 'application services.')
+    parser.add_argument('--runs', type=int, default=10, help='Number of processes per scenario.')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        artifact_path = os.path.join(directory, 'app_artifact.json')
+        AppArtifact(app_id=APP_ID,
+                    asa_id=ASA_ID,
+                    teal_version=TEAL_VERSION,
+                    approval_program_hash="",
+                    asa_delegate_authority_code_bytes=ASA_DELEGATE_AUTHORITY_CODE_BYTES,
+                    algo_delegate_authority_code_bytes=ALGO_DELEGATE_AUTHORITY_CODE_BYTES).save(artifact_path)
+
+        for name, code in SCENARIOS.items():
+            duration = measure(code.format(artifact_path=artifact_path), runs=args.runs)
+            print(f'{name:<40}{duration * 1e3:>10.1f}ms')
+
+
+if __name__ == '__main__':
+    main()
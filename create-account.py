@@ -1,11 +1,33 @@
 #!/usr/bin/env python
-import base64
-from typing import List, Any, Optional
+import argparse
 import algosdk
 
+from src.app_utils.account_factory import generate_raw_keys, write_accounts_file, write_accounts_yaml
 
-sk, pk = algosdk.account.generate_account()
-print(f"""
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Creates Algorand accounts.')
+    parser.add_argument('--count', type=int, default=1, help='Number of accounts to create.')
+    parser.add_argument('--output', help='File to which the accounts are written instead of printing them.')
+    parser.add_argument('--format', choices=['binary', 'yaml'], default='binary',
+                        help='binary accounts file for the bidder_accounts section of config.yml or '
+                             'developer_N_credentials entries.')
+    parser.add_argument('--workers', type=int, help='Number of processes. Defaults to the number of cores.')
+    parser.add_argument('--first-id', type=int, default=1, help='Developer id of the first account in yaml format.')
+    args = parser.parse_args()
+
+    if args.output is None:
+        for _ in range(args.count):
+            sk, pk = algosdk.account.generate_account()
+            print(f"""
   private_key: {sk}
   public_key: {pk}
 """)
+    else:
+        raw_keys = generate_raw_keys(count=args.count, workers=args.workers)
+
+        if args.format == 'binary':
+            write_accounts_file(path=args.output, raw_keys=raw_keys)
+        else:
+            write_accounts_yaml(path=args.output, raw_keys=raw_keys, first_developer_id=args.first_id)
+
+        print(f'Created {args.count} accounts in {args.output}')
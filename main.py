@@ -1,29 +1,34 @@
+import argparse
+
 from src.app_services.app_initializaion_service import AppInitializationService
 from src.app_services.app_interaction_service import AppInteractionService
 from src.app_utils.credentials import main_developer_credentials, get_developer_credentials
 
+parser = argparse.ArgumentParser(description='Initializes a bidding application and runs a sample auction.')
+parser.add_argument('--fee-pooling', action='store_true', help='The bidders pay the fees of the delegate authorities.')
+parser.add_argument('--checkpoint', help='Location of the initialization checkpoint. Defaults to a file named after '
+                                         'the creator of the application and the fee mode.')
+args = parser.parse_args()
+
 main_dev_pk, main_dev_address = main_developer_credentials()
 
+# Runs with a different creator or fee mode do not resume from each other's checkpoint.
+checkpoint_path = args.checkpoint or \
+    f"app_initialization_checkpoint_{main_dev_address[:8]}{'_fee_pooling' if args.fee_pooling else ''}.json"
+
 app_initialization_service = AppInitializationService(app_creator_pk=main_dev_pk,
                                                       app_creator_address=main_dev_address,
                                                       asa_unit_name="wawa",
                                                       asa_asset_name="wawa",
                                                       app_duration=150,
-                                                      teal_version=3)
-
-app_initialization_service.create_application()
-
-app_initialization_service.create_asa()
+                                                      teal_version=3,
+                                                      checkpoint_path=checkpoint_path,
+                                                      fee_pooling=args.fee_pooling)
 
-app_initialization_service.setup_asa_delegate_smart_contract()
-app_initialization_service.deposit_fee_funds_to_asa_delegate_authority()
-
-app_initialization_service.change_asa_credentials()
-
-app_initialization_service.setup_algo_delegate_smart_contract()
-app_initialization_service.deposit_fee_funds_to_algo_delegate_authority()
-
-app_initialization_service.setup_app_delegates_authorities()
+# Executes the initialization steps: creating the application and the ASA, setting up and funding the delegate
+# authorities and registering them in the application. If the script is interrupted, running it again resumes from
+# the last step that is confirmed on the network.
+app_initialization_service.run_initialization()
 
 print(f'app_id: {app_initialization_service.app_id} \n'
       f'asa_id: {app_initialization_service.asa_id} \n'
@@ -32,10 +37,10 @@ print(f'app_id: {app_initialization_service.app_id} \n'
 
 bidder_pk, bidder_address = get_developer_credentials(developer_id=1)
 
-app_interaction_service = AppInteractionService(app_id=app_initialization_service.app_id,
-                                                asa_id=app_initialization_service.asa_id,
-                                                current_owner_address=main_dev_address,
-                                                teal_version=3)
+app_initialization_service.export_artifact(path="app_artifact.json")
+
+app_interaction_service = AppInteractionService.from_artifact(artifact_path="app_artifact.json",
+                                                              current_owner_address=main_dev_address)
 
 app_interaction_service.execute_bidding(bidder_private_key=bidder_pk,
                                         bidder_address=bidder_address,
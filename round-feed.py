@@ -0,0 +1,25 @@
+#!/usr/bin/env python
+import argparse
+
+import src.app_utils.credentials as developer_credentials
+from src.app_services.round_feed import RoundFeedPublisher
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Publishes the round, the suggested params and the global state of '
+                                                 'the applications to the bidder processes on this machine.')
+    parser.add_argument('--name', default='asa-bidding-round-feed', help='Name of the shared memory segment.')
+    parser.add_argument('--app-id', type=int, action='append', default=[], dest='app_ids',
+                        help='Application whose global state is published. Can be repeated.')
+    args = parser.parse_args()
+
+    publisher = RoundFeedPublisher(client=developer_credentials.get_client(round_feed=False),
+                                   name=args.name,
+                                   app_ids=args.app_ids)
+
+    print(f'Publishing the round feed {args.name}')
+    try:
+        publisher.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        publisher.close()
@@ -1,23 +1,49 @@
 from pyteal import *
 
+from src.app_pyteal.app_variables import AppActions
 
-def algo_delegate_authority_logic(app_id: int):
+
+def algo_delegate_authority_logic(app_id: int, fee_pooling: bool = False):
     """
     Signing authority for bidding app. This authority is responsible for receiving the ALGOs from the current bidder
     that owns the NFT, refunding the ALGOs to the previous owner of the NFT and after the bidding termination from this
     address we pay the ALGOs to the seller of the NFT.
+    The authority signs:
+        - the refund, the third transaction of a bid, 2 transactions after the bid application call.
+        - the payment to the seller, the transaction right after the "settle" application call of the app.
+        - without fee pooling, the "settle" application call itself.
     :param app_id: int - the application to which this delegate will be responsible for.
+    :param fee_pooling: bool - if True the transactions of this delegate carry no fee, the other transactions in the
+    group pay for them.
     :return:
     """
 
-    is_bidding = Global.group_size() == Int(4)
-
-    return If(is_bidding,
-              And(Gtxn[0].application_id() == Int(app_id),
-                  Gtxn[2].fee() <= Int(1000),
-                  Gtxn[2].asset_close_to() == Global.zero_address(),
-                  Gtxn[2].rekey_to() == Global.zero_address()),
-              And(Gtxn[0].application_id() == Int(app_id),
-                  Gtxn[1].fee() <= Int(1000),
-                  Gtxn[1].asset_close_to() == Global.zero_address(),
-                  Gtxn[1].rekey_to() == Global.zero_address()))
+    def is_settle_app_call(txn):
+        return And(txn.type_enum() == TxnType.ApplicationCall,
+                   txn.application_id() == Int(app_id),
+                   txn.application_args[0] == Bytes(AppActions.paymentToSeller))
+
+    is_acceptable_fee = Txn.fee() == Int(0) if fee_pooling else Txn.fee() <= Int(1000)
+
+    is_safe_transaction = And(is_acceptable_fee,
+                              Txn.close_remainder_to() == Global.zero_address(),
+                              Txn.asset_close_to() == Global.zero_address(),
+                              Txn.rekey_to() == Global.zero_address())
+
+    previous_txn = Gtxn[Txn.group_index() - Int(1)]
+    is_after_settle_app_call = previous_txn.application_args.length() == Int(1)
+
+    bid_app_call = Gtxn[Txn.group_index() - Int(2)]
+    is_bidding_refund = And(bid_app_call.type_enum() == TxnType.ApplicationCall,
+                            bid_app_call.application_id() == Int(app_id),
+                            bid_app_call.on_completion() == OnComplete.NoOp,
+                            bid_app_call.application_args.length() == Int(0))
+
+    is_valid_payment = If(is_after_settle_app_call,
+                          is_settle_app_call(previous_txn),
+                          is_bidding_refund)
+
+    return And(is_safe_transaction,
+               If(Txn.type_enum() == TxnType.ApplicationCall,
+                  is_settle_app_call(Txn),
+                  is_valid_payment))
@@ -1,32 +1,6 @@
 from pyteal import *
 
-
-class AppVariables:
-    """
-    All the possible global variables in the application.
-    """
-    asaSellerAddress = "asaSellerAddress"
-    highestBid = "HighestBid"
-    asaOwnerAddress = "ASAOwnerAddress"
-    asaDelegateAddress = "ASADelegateAddress"
-    algoDelegateAddress = "AlgoDelegateAddress"
-    appStartRound = "appStartRound"
-    appEndRound = "appEndRound"
-
-    @classmethod
-    def number_of_int(cls):
-        return 3
-
-    @classmethod
-    def number_of_str(cls):
-        return 4
-
-
-class DefaultValues:
-    """
-    The default values for the global variables initialized on the transaction that creates the application.
-    """
-    highestBid = 0
+from src.app_pyteal.app_variables import AppVariables, DefaultValues, AppActions
 
 
 def application_start(initialization_code,
@@ -65,27 +39,29 @@ def setup_possible_app_calls_logic(asset_authorities_code, transfer_asa_code, pa
         - App call with 5 arguments: ASADelegateAddress, AlgoDelegateAddress, asaOwnerAddress, appDuration
         and ASASellerAddress.
     2. Transferring the ASA
-        - Atomic transfer with 4 transactions:
+        - Application call without arguments, followed by 3 transactions:
             2.1 - Application call.
             2.2 - Payment to the algoDelegateAddress which represents the latest bid for the ASA.
             2.3 - Payment from the algoDelegateAddress to the old owner of the ASA which returns the algo funds.
             2.4 - Payment from the ASADelegateAddress that transfers the ASA from the old owner to the new one.
+        Up to 4 of those bids, for different applications, can be in one group.
     3. Paying the highest bid to the asaSellerAddress. This can happen after the bidding period has ended.
-        - Atomic transfer with 2 transactions:
-            3.1 - Application call
-            3.2 - Payment from the ALGO Delegate Authority to the asaSellerAddress.
+        - Application call with the single argument "settle", followed by the payment from the ALGO Delegate
+        Authority to the asaSellerAddress. Up to 8 of those pairs, for different applications, can be in one group.
     :param asset_authorities_code: The code that is responsible for setting up the delegate authorities in the app.
     :param transfer_asa_code: The code that is responsible for the bidding logic.
     :param payment_to_seller_code: The code that is responsible for paying the highest bid to the seller of the ASA.
     :return:
     """
     is_setting_up_asset_authorities = Global.group_size() == Int(1)
-    is_transferring_asa = Global.group_size() == Int(4)
-    is_payment_to_seller = Global.group_size() == Int(2)
+    is_transferring_asa = Txn.application_args.length() == Int(0)
+    is_tagged_action = Txn.application_args.length() == Int(1)
+    is_payment_to_seller = Txn.application_args[0] == Bytes(AppActions.paymentToSeller)
 
     return If(is_setting_up_asset_authorities, asset_authorities_code,
-              If(is_transferring_asa, transfer_asa_code,
-                 If(is_payment_to_seller, payment_to_seller_code, Return(Int(0)))))
+              If(is_tagged_action,
+                 If(is_payment_to_seller, payment_to_seller_code, Return(Int(0))),
+                 If(is_transferring_asa, transfer_asa_code, Return(Int(0)))))
 
 
 def setup_asset_authorities_logic():
@@ -127,27 +103,32 @@ def setup_asset_authorities_logic():
     ])
 
 
-def asa_transfer_logic():
+def asa_transfer_logic(fee_pooling: bool = False):
     """
     Transferring the ASA is atomic transfer with 4 transactions:
         1 - Application call.
         2 - Payment to the algoDelegateAddress which represents the latest bid for the ASA.
         3 - Payment from the algoDelegateAddress to the old owner of the ASA which returns the ALGO funds.
         4 - Payment from the ASADelegateAddress that transfers the ASA from the old owner to the new one.
+    The other transactions follow the application call, they are found relative to its index in the group, so bids for
+    up to 4 different applications can be in one group.
+    :param fee_pooling: If True the transactions of the delegate authorities must not carry any fee, the bidder pays
+    the fees of the whole group.
     :return:
     """
-    # Valid first transaction
-    valid_first_transaction = Gtxn[0].type_enum() == TxnType.ApplicationCall
+    bid_payment_txn = Gtxn[Txn.group_index() + Int(1)]
+    refund_txn = Gtxn[Txn.group_index() + Int(2)]
+    asa_transfer_txn = Gtxn[Txn.group_index() + Int(3)]
 
     # Valid second transaction
-    second_transaction_is_payment = Gtxn[1].type_enum() == TxnType.Payment
-    do_first_two_transaction_have_same_sender = Gtxn[1].sender() == Gtxn[0].sender()
+    second_transaction_is_payment = bid_payment_txn.type_enum() == TxnType.Payment
+    do_first_two_transaction_have_same_sender = bid_payment_txn.sender() == Txn.sender()
 
     current_highest_bid = App.globalGet(Bytes(AppVariables.highestBid))
-    is_valid_amount_to_change_titles = Gtxn[1].amount() > current_highest_bid
+    is_valid_amount_to_change_titles = bid_payment_txn.amount() > current_highest_bid
 
     algo_delegate_address = App.globalGet(Bytes(AppVariables.algoDelegateAddress))
-    is_paid_to_algo_delegate_address = Gtxn[1].receiver() == algo_delegate_address
+    is_paid_to_algo_delegate_address = bid_payment_txn.receiver() == algo_delegate_address
 
     valid_second_transaction = And(second_transaction_is_payment,
                                    do_first_two_transaction_have_same_sender,
@@ -157,42 +138,47 @@ def asa_transfer_logic():
     # Valid third transaction
     old_owner_address = App.globalGet(Bytes(AppVariables.asaOwnerAddress))
 
-    third_transaction_is_payment = Gtxn[2].type_enum() == TxnType.Payment
-    is_paid_from_algo_delegate_authority = Gtxn[2].sender() == algo_delegate_address
-    is_paid_to_old_owner = Gtxn[2].receiver() == old_owner_address
-    is_paid_right_amount = Gtxn[2].amount() == current_highest_bid
+    third_transaction_is_payment = refund_txn.type_enum() == TxnType.Payment
+    is_paid_from_algo_delegate_authority = refund_txn.sender() == algo_delegate_address
+    is_paid_to_old_owner = refund_txn.receiver() == old_owner_address
+    is_paid_right_amount = refund_txn.amount() == current_highest_bid
 
     valid_third_transaction = And(third_transaction_is_payment,
                                   is_paid_from_algo_delegate_authority,
                                   is_paid_to_old_owner,
                                   is_paid_right_amount)
 
+    if fee_pooling:
+        valid_third_transaction = And(valid_third_transaction, refund_txn.fee() == Int(0))
+
     # Valid fourth transaction
     asa_delegate_address = App.globalGet(Bytes(AppVariables.asaDelegateAddress))
 
-    fourth_transaction_is_asset_transfer = Gtxn[3].type_enum() == TxnType.AssetTransfer
-    is_paid_from_asa_delegate_authority = Gtxn[3].sender() == asa_delegate_address
-    is_the_new_owner_receiving_the_asa = Gtxn[3].asset_receiver() == Gtxn[1].sender()
+    fourth_transaction_is_asset_transfer = asa_transfer_txn.type_enum() == TxnType.AssetTransfer
+    is_paid_from_asa_delegate_authority = asa_transfer_txn.sender() == asa_delegate_address
+    is_the_new_owner_receiving_the_asa = asa_transfer_txn.asset_receiver() == bid_payment_txn.sender()
 
     valid_forth_transaction = And(fourth_transaction_is_asset_transfer,
                                   is_paid_from_asa_delegate_authority,
                                   is_the_new_owner_receiving_the_asa)
 
+    if fee_pooling:
+        valid_forth_transaction = And(valid_forth_transaction, asa_transfer_txn.fee() == Int(0))
+
     # Valid time
     end_round = App.globalGet(Bytes(AppVariables.appEndRound))
     is_app_active = Global.round() <= end_round
 
     # Updating the app state
-    update_highest_bid = App.globalPut(Bytes(AppVariables.highestBid), Gtxn[1].amount())
-    update_owner_address = App.globalPut(Bytes(AppVariables.asaOwnerAddress), Gtxn[1].sender())
+    update_highest_bid = App.globalPut(Bytes(AppVariables.highestBid), bid_payment_txn.amount())
+    update_owner_address = App.globalPut(Bytes(AppVariables.asaOwnerAddress), bid_payment_txn.sender())
     update_app_state = Seq([
         update_highest_bid,
         update_owner_address,
         Return(Int(1))
     ])
 
-    are_valid_transactions = And(valid_first_transaction,
-                                 valid_second_transaction,
+    are_valid_transactions = And(valid_second_transaction,
                                  valid_third_transaction,
                                  valid_forth_transaction,
                                  is_app_active)
@@ -200,56 +186,66 @@ def asa_transfer_logic():
     return If(are_valid_transactions, update_app_state, Seq([Return(Int(0))]))
 
 
-def payment_to_seller_logic():
+def payment_to_seller_logic(fee_pooling: bool = False):
     """
     Once the bidding process has ended we should transfer the amount of highest bid of the ALGOs to the asaSellerAddress
-    This is an atomic transfer of 2 transactions:
+    This is a pair of transactions in an atomic transfer:
     1. Application call - where we make sure that the bidding duration of the app has ended.
     2. Payment transaction - this transaction represents the payment from the ALGO Delegate Authority to the
     asaSellerAddress. We need to make sure that the right amount of ALGOs is sent from the ALGO Delegate Authority
     to the asaOwnerAddress.
+    The payment is the transaction right after the application call, so the pairs of several applications can be
+    settled in the same group.
+    :param fee_pooling: If True the payment from the ALGO Delegate Authority must not carry any fee, the sender of the
+    application call pays the fees of the whole group.
     :return:
     """
-    # Valid first transaction
+    # Valid application call
     end_round = App.globalGet(Bytes(AppVariables.appEndRound))
-    is_application_call = Gtxn[0].type_enum() == TxnType.ApplicationCall
     bidding_period_has_ended = Global.round() > end_round
 
-    valid_first_transaction = And(is_application_call, bidding_period_has_ended)
+    valid_first_transaction = bidding_period_has_ended
 
-    # Valid second transaction
-    is_payment_call = Gtxn[1].type_enum() == TxnType.Payment
+    # Valid payment transaction
+    payment_txn = Gtxn[Txn.group_index() + Int(1)]
+
+    is_payment_call = payment_txn.type_enum() == TxnType.Payment
 
     asa_seller_address = App.globalGet(Bytes(AppVariables.asaSellerAddress))
-    valid_receiver_of_algos = asa_seller_address == Gtxn[1].receiver()
+    valid_receiver_of_algos = asa_seller_address == payment_txn.receiver()
 
     highest_bid = App.globalGet(Bytes(AppVariables.highestBid))
-    valid_amount_of_algos = highest_bid == Gtxn[1].amount()
+    valid_amount_of_algos = highest_bid == payment_txn.amount()
 
     algo_delegate_authority = App.globalGet(Bytes(AppVariables.algoDelegateAddress))
-    valid_sender = algo_delegate_authority == Gtxn[1].sender()
+    valid_sender = algo_delegate_authority == payment_txn.sender()
 
     valid_second_transaction = And(is_payment_call,
                                    valid_receiver_of_algos,
                                    valid_amount_of_algos,
                                    valid_sender)
 
+    if fee_pooling:
+        valid_second_transaction = And(valid_second_transaction, payment_txn.fee() == Int(0))
+
     are_valid_transactions = And(valid_first_transaction,
                                  valid_second_transaction)
 
     return If(are_valid_transactions, Seq([Return(Int(1))]), Seq([Return(Int(0))]))
 
 
-def approval_program():
+def approval_program(fee_pooling: bool = False):
     """
     Approval program of the application. Combines all the logic of the application that was implemented previously.
+    :param fee_pooling: If True the transactions of the delegate authorities must not carry any fee.
     :return:
     """
     return application_start(initialization_code=app_initialization_logic(),
                              application_actions=
                              setup_possible_app_calls_logic(asset_authorities_code=setup_asset_authorities_logic(),
-                                                            transfer_asa_code=asa_transfer_logic(),
-                                                            payment_to_seller_code=payment_to_seller_logic()))
+                                                            transfer_asa_code=asa_transfer_logic(fee_pooling),
+                                                            payment_to_seller_code=
+                                                            payment_to_seller_logic(fee_pooling)))
 
 
 def clear_program():
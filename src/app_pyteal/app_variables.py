@@ -0,0 +1,33 @@
+class AppVariables:
+    """
+    All the possible global variables in the application.
+    """
+    asaSellerAddress = "asaSellerAddress"
+    highestBid = "HighestBid"
+    asaOwnerAddress = "ASAOwnerAddress"
+    asaDelegateAddress = "ASADelegateAddress"
+    algoDelegateAddress = "AlgoDelegateAddress"
+    appStartRound = "appStartRound"
+    appEndRound = "appEndRound"
+
+    @classmethod
+    def number_of_int(cls):
+        return 3
+
+    @classmethod
+    def number_of_str(cls):
+        return 4
+
+
+class DefaultValues:
+    """
+    The default values for the global variables initialized on the transaction that creates the application.
+    """
+    highestBid = 0
+
+
+class AppActions:
+    """
+    The application argument that tags an application call with the action that it executes.
+    """
+    paymentToSeller = "settle"
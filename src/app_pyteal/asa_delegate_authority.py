@@ -1,20 +1,27 @@
 from pyteal import *
 
 
-def asa_delegate_authority_logic(app_id: int, asa_id: int):
+def asa_delegate_authority_logic(app_id: int, asa_id: int, fee_pooling: bool = False):
     """
     Signing authority for the bidding application. This authority is responsible for transferring the NFT from one owner
     to another one via AtomicTransfer transaction.
+    The transfer is the last transaction of a bid, the bid application call is 3 transactions before it.
     :param app_id: int - the application to which this delegate will be responsible for.
     :param asa_id: int - the NFT that this authority can transfer.
+    :param fee_pooling: bool - if True the transfer carries no fee, the other transactions in the group pay for it.
     :return:
     """
-    is_calling_right_app = Gtxn[0].application_id() == Int(app_id)
-    is_valid_amount = Gtxn[3].asset_amount() == Int(1)
-    is_valid_asa_transferred = Gtxn[3].xfer_asset() == Int(asa_id)
-    is_acceptable_fee = Gtxn[3].fee() <= Int(1000)
-    is_valid_close_to_address = Gtxn[3].asset_close_to() == Global.zero_address()
-    is_valid_rekey_to_address = Gtxn[3].rekey_to() == Global.zero_address()
+    bid_app_call = Gtxn[Txn.group_index() - Int(3)]
+
+    is_calling_right_app = And(bid_app_call.type_enum() == TxnType.ApplicationCall,
+                               bid_app_call.application_id() == Int(app_id),
+                               bid_app_call.on_completion() == OnComplete.NoOp,
+                               bid_app_call.application_args.length() == Int(0))
+    is_valid_amount = Txn.asset_amount() == Int(1)
+    is_valid_asa_transferred = Txn.xfer_asset() == Int(asa_id)
+    is_acceptable_fee = Txn.fee() == Int(0) if fee_pooling else Txn.fee() <= Int(1000)
+    is_valid_close_to_address = Txn.asset_close_to() == Global.zero_address()
+    is_valid_rekey_to_address = Txn.rekey_to() == Global.zero_address()
 
     return And(is_calling_right_app,
                is_valid_amount,
@@ -1,18 +1,36 @@
-from src.app_pyteal.app_source_code import approval_program, clear_program, AppVariables
-from src.app_pyteal.asa_delegate_authority import asa_delegate_authority_logic
-from src.app_pyteal.algo_delegate_authority import algo_delegate_authority_logic
+import base64
+
+from src.app_pyteal.app_variables import AppVariables
 
 import src.app_utils.blockchain_utils as blockchain_utils
 import src.app_utils.credentials as developer_credentials
-
-from pyteal import compileTeal, Mode
+from src.app_utils.app_artifacts import AppArtifact
+from src.app_services.initialization_checkpoint import InitializationCheckpoint
 
 from algosdk import logic as algo_logic
 from algosdk.future import transaction as algo_txn
 from algosdk.encoding import decode_address
+from algosdk import error as algo_error
+from algosdk.v2client import algod
+from typing import List
 
 
 class AppInitializationService:
+    initialization_steps = [
+        'create_application',
+        'create_asa',
+        'setup_asa_delegate_smart_contract',
+        'deposit_fee_funds_to_asa_delegate_authority',
+        'change_asa_credentials',
+        'setup_algo_delegate_smart_contract',
+        'deposit_fee_funds_to_algo_delegate_authority',
+        'setup_app_delegates_authorities',
+    ]
+
+    fee_deposit_steps = [
+        'deposit_fee_funds_to_asa_delegate_authority',
+        'deposit_fee_funds_to_algo_delegate_authority',
+    ]
 
     def __init__(self,
                  app_creator_pk: str,
@@ -20,7 +38,10 @@ class AppInitializationService:
                  asa_unit_name: str,
                  asa_asset_name: str,
                  app_duration: int,
-                 teal_version: int = 3):
+                 teal_version: int = 3,
+                 checkpoint_path: str = None,
+                 client: algod.AlgodClient = None,
+                 fee_pooling: bool = False):
         """
         Object that defines the initialization of the bidding application.
         :param app_creator_pk: Private key of the creator of the application.
@@ -29,6 +50,12 @@ class AppInitializationService:
         :param asa_asset_name: The name of the NFT.
         :param app_duration: The number of rounds that the bidding application will be available on the network.
         :param teal_version: The version of the teal code.
+        :param checkpoint_path: Location of the checkpoint file. When provided, the result of every initialization step
+        is written to it and run_initialization resumes from the last verified step.
+        :param client: The client through which the service talks to the network. Defaults to the client configured in
+        config.yml, which is created when the first request is sent.
+        :param fee_pooling: If True the programs are compiled for groups in which the bidder pays the fees of the
+        delegate authorities, so the delegate authorities do not need any fee deposits.
         """
         self.app_creator_pk = app_creator_pk
         self.app_creator_address = app_creator_address
@@ -36,31 +63,44 @@ class AppInitializationService:
         self.asa_asset_name = asa_asset_name
         self.app_duration = app_duration
         self.teal_version = teal_version
+        self.fee_pooling = fee_pooling
 
-        self.client = developer_credentials.get_client()
-        self.approval_program_code = approval_program()
-        self.clear_program_code = clear_program()
+        self._client = client
 
         self.app_id = -1
         self.asa_id = -1
+        self.approval_program_bytes = b''
+        self.asa_delegate_authority_code_bytes = b''
+        self.algo_delegate_authority_code_bytes = b''
         self.asa_delegate_authority_address = ''
         self.algo_delegate_authority_address = ''
 
+        self.checkpoint = InitializationCheckpoint.load(checkpoint_path) if checkpoint_path is not None else None
+
+    @property
+    def client(self) -> algod.AlgodClient:
+        if self._client is None:
+            self._client = developer_credentials.get_client()
+        return self._client
+
     def create_application(self):
         """
         Executes a transaction that creates the bidding application and publishes it on the network. It combines the
         approval and the clear program with the corresponding schemas needed for the application.
         :return:
         """
-        approval_program_compiled = compileTeal(self.approval_program_code,
+        from pyteal import compileTeal, Mode
+        from src.app_pyteal.app_source_code import approval_program, clear_program
+
+        approval_program_compiled = compileTeal(approval_program(fee_pooling=self.fee_pooling),
                                                 mode=Mode.Application,
                                                 version=self.teal_version)
-        clear_program_compiled = compileTeal(self.clear_program_code,
+        clear_program_compiled = compileTeal(clear_program(),
                                              mode=Mode.Application,
                                              version=self.teal_version)
 
-        approval_program_bytes = blockchain_utils.compile_program(client=self.client,
-                                                                  source_code=approval_program_compiled)
+        self.approval_program_bytes = blockchain_utils.compile_program(client=self.client,
+                                                                       source_code=approval_program_compiled)
 
         clear_program_bytes = blockchain_utils.compile_program(client=self.client,
                                                                source_code=clear_program_compiled)
@@ -73,12 +113,14 @@ class AppInitializationService:
 
         self.app_id = blockchain_utils.create_application(client=self.client,
                                                           creator_private_key=self.app_creator_pk,
-                                                          approval_program=approval_program_bytes,
+                                                          approval_program=self.approval_program_bytes,
                                                           clear_program=clear_program_bytes,
                                                           global_schema=global_schema,
                                                           local_schema=local_schema,
                                                           app_args=None)
 
+        self._complete_step('create_application')
+
     def create_asa(self):
         """
         Creates the NFT for which the customers will bid for. It is frozen because we want the transfer of the NFT to go
@@ -97,6 +139,8 @@ class AppInitializationService:
                                                                       clawback_address=self.app_creator_address,
                                                                       default_frozen=True)
 
+        self._complete_step('create_asa')
+
     def setup_asa_delegate_smart_contract(self):
         """
         Sets up the delegate authority that is responsible for transferring the NFT.
@@ -107,15 +151,23 @@ class AppInitializationService:
         if self.asa_id == -1:
             raise ValueError('The Algorand Standard Asset of interest has not been created')
 
+        self.asa_delegate_authority_code_bytes = self._compile_asa_delegate_authority()
+        self.asa_delegate_authority_address = algo_logic.address(self.asa_delegate_authority_code_bytes)
+
+        self._complete_step('setup_asa_delegate_smart_contract')
+
+    def _compile_asa_delegate_authority(self) -> bytes:
+        from pyteal import compileTeal, Mode
+        from src.app_pyteal.asa_delegate_authority import asa_delegate_authority_logic
+
         asa_delegate_authority_compiled = compileTeal(asa_delegate_authority_logic(app_id=self.app_id,
-                                                                                   asa_id=self.asa_id),
+                                                                                   asa_id=self.asa_id,
+                                                                                   fee_pooling=self.fee_pooling),
                                                       mode=Mode.Signature,
                                                       version=self.teal_version)
 
-        asa_delegate_authority_bytes = blockchain_utils.compile_program(client=self.client,
-                                                                        source_code=asa_delegate_authority_compiled)
-
-        self.asa_delegate_authority_address = algo_logic.address(asa_delegate_authority_bytes)
+        return blockchain_utils.compile_program(client=self.client,
+                                                source_code=asa_delegate_authority_compiled)
 
     def deposit_fee_funds_to_asa_delegate_authority(self):
         """
@@ -130,6 +182,8 @@ class AppInitializationService:
                                          reciever_address=self.asa_delegate_authority_address,
                                          amount=1000000)
 
+        self._complete_step('deposit_fee_funds_to_asa_delegate_authority')
+
     def change_asa_credentials(self):
         """
         Changes the credentials of the NFT. All of the credentials features are disabled expect the clawback_address
@@ -151,6 +205,8 @@ class AppInitializationService:
                                                freeze_address="",
                                                clawback_address=self.asa_delegate_authority_address)
 
+        self._complete_step('change_asa_credentials')
+
     def setup_algo_delegate_smart_contract(self):
         """
         Sets up the delegate authority that is responsible for receiving the ALGOs from the current owner of the NFT and
@@ -160,14 +216,22 @@ class AppInitializationService:
         if self.app_id == -1:
             raise ValueError('The application has not been created')
 
-        algo_delegate_authority_compiled = compileTeal(algo_delegate_authority_logic(app_id=self.app_id),
+        self.algo_delegate_authority_code_bytes = self._compile_algo_delegate_authority()
+        self.algo_delegate_authority_address = algo_logic.address(self.algo_delegate_authority_code_bytes)
+
+        self._complete_step('setup_algo_delegate_smart_contract')
+
+    def _compile_algo_delegate_authority(self) -> bytes:
+        from pyteal import compileTeal, Mode
+        from src.app_pyteal.algo_delegate_authority import algo_delegate_authority_logic
+
+        algo_delegate_authority_compiled = compileTeal(algo_delegate_authority_logic(app_id=self.app_id,
+                                                                                     fee_pooling=self.fee_pooling),
                                                        mode=Mode.Signature,
                                                        version=self.teal_version)
 
-        algo_delegate_authority_bytes = blockchain_utils.compile_program(client=self.client,
-                                                                         source_code=algo_delegate_authority_compiled)
-
-        self.algo_delegate_authority_address = algo_logic.address(algo_delegate_authority_bytes)
+        return blockchain_utils.compile_program(client=self.client,
+                                                source_code=algo_delegate_authority_compiled)
 
     def deposit_fee_funds_to_algo_delegate_authority(self):
         """
@@ -182,6 +246,8 @@ class AppInitializationService:
                                          reciever_address=self.algo_delegate_authority_address,
                                          amount=1000000)
 
+        self._complete_step('deposit_fee_funds_to_algo_delegate_authority')
+
     def setup_app_delegates_authorities(self):
         """
         Calling the application to setup the delegate authorities addresses as global variables. We can execute this
@@ -218,3 +284,167 @@ class AppInitializationService:
                                           app_id=self.app_id,
                                           on_comlete=algo_txn.OnComplete.NoOpOC,
                                           app_args=app_args)
+
+        self._complete_step('setup_app_delegates_authorities')
+
+    def export_artifact(self, path: str):
+        """
+        Writes the ids, the compiled delegate authorities and the approval program hash of the application to a
+        file, from which the AppInteractionService can be created without compiling any TEAL.
+        :param path: The location of the artifact file.
+        :return:
+        """
+        if self.app_id == -1:
+            raise ValueError('The application has not been created')
+
+        if self.asa_id == -1:
+            raise ValueError('The Algorand Standard Asset of interest has not been created')
+
+        if self.asa_delegate_authority_address == '':
+            raise ValueError('The asa delegate authority has not been created')
+
+        if self.algo_delegate_authority_address == '':
+            raise ValueError('The algo delegate authority has not been created')
+
+        artifact = AppArtifact(app_id=self.app_id,
+                               asa_id=self.asa_id,
+                               teal_version=self.teal_version,
+                               approval_program_hash=algo_logic.address(self.approval_program_bytes),
+                               asa_delegate_authority_code_bytes=self.asa_delegate_authority_code_bytes,
+                               algo_delegate_authority_code_bytes=self.algo_delegate_authority_code_bytes,
+                               fee_pooling=self.fee_pooling)
+        artifact.save(path)
+
+    def required_initialization_steps(self) -> List[str]:
+        """
+        :return:
+            The initialization steps in order. With fee pooling the fee deposits to the delegate authorities are
+            skipped.
+        """
+        return [step for step in self.initialization_steps
+                if not (self.fee_pooling and step in self.fee_deposit_steps)]
+
+    def run_initialization(self):
+        """
+        Executes all of the initialization steps in order. With a checkpoint, the steps that have been completed
+        before are verified on the network first and only the remaining steps are executed.
+        :return:
+        """
+        if self.checkpoint is not None:
+            self.resume()
+
+        for step in self.required_initialization_steps():
+            if self.checkpoint is not None and self.checkpoint.is_completed(step):
+                continue
+            getattr(self, step)()
+
+    def resume(self):
+        """
+        Restores the state of the service from the checkpoint and verifies the completed steps on the network. The
+        first step that can not be verified and all of the steps after it are marked to be executed again.
+        :return:
+            The list of the steps that still need to be executed.
+        """
+        if self.checkpoint is None:
+            raise ValueError('The service has been created without a checkpoint')
+
+        self._restore_checkpoint_state(self.checkpoint.state)
+
+        required_steps = self.required_initialization_steps()
+
+        for step in required_steps:
+            if not self.checkpoint.is_completed(step):
+                break
+            if not self._is_step_verified(step):
+                self.checkpoint.keep_steps_before(step)
+                break
+
+        return [step for step in required_steps if not self.checkpoint.is_completed(step)]
+
+    def _complete_step(self, step: str):
+        if self.checkpoint is not None:
+            self.checkpoint.mark_completed(step, self._checkpoint_state())
+
+    def _checkpoint_state(self) -> dict:
+        return {
+            'app_id': self.app_id,
+            'asa_id': self.asa_id,
+            'approval_program_bytes': base64.b64encode(self.approval_program_bytes).decode(),
+            'asa_delegate_authority_code_bytes': base64.b64encode(self.asa_delegate_authority_code_bytes).decode(),
+            'algo_delegate_authority_code_bytes': base64.b64encode(self.algo_delegate_authority_code_bytes).decode(),
+            'asa_delegate_authority_address': self.asa_delegate_authority_address,
+            'algo_delegate_authority_address': self.algo_delegate_authority_address,
+            'teal_version': self.teal_version,
+            'fee_pooling': self.fee_pooling,
+        }
+
+    def _restore_checkpoint_state(self, state: dict):
+        if not state:
+            return
+
+        # The programs in the checkpoint were compiled for its TEAL version and fee mode. Checkpoints written before
+        # the fee mode was stored are without fee pooling.
+        if state.get('teal_version', self.teal_version) != self.teal_version:
+            raise ValueError(f"The checkpoint was created with TEAL version {state['teal_version']}, not "
+                             f"{self.teal_version}")
+        if state.get('fee_pooling', False) != self.fee_pooling:
+            raise ValueError(f"The checkpoint was created with fee_pooling={state.get('fee_pooling', False)}, not "
+                             f"fee_pooling={self.fee_pooling}")
+
+        self.app_id = state['app_id']
+        self.asa_id = state['asa_id']
+        self.approval_program_bytes = base64.b64decode(state['approval_program_bytes'])
+        self.asa_delegate_authority_code_bytes = base64.b64decode(state['asa_delegate_authority_code_bytes'])
+        self.algo_delegate_authority_code_bytes = base64.b64decode(state['algo_delegate_authority_code_bytes'])
+        self.asa_delegate_authority_address = state['asa_delegate_authority_address']
+        self.algo_delegate_authority_address = state['algo_delegate_authority_address']
+
+    def _is_step_verified(self, step: str) -> bool:
+        """
+        Checks that the result of a completed step is present on the network.
+        :param step: The name of the step.
+        :return:
+        """
+        try:
+            if step == 'create_application':
+                application_info = self.client.application_info(self.app_id)
+                approval_program_bytes = base64.b64decode(application_info['params']['approval-program'])
+                return approval_program_bytes == self.approval_program_bytes
+
+            if step == 'create_asa':
+                asset_info = self.client.asset_info(self.asa_id)
+                return asset_info['params']['creator'] == self.app_creator_address
+
+            # The delegate authorities are bound to the application and the ASA that they were compiled for, both
+            # have to exist on the network and the stored program has to be the one compiled for them now.
+            if step == 'setup_asa_delegate_smart_contract':
+                self.client.application_info(self.app_id)
+                self.client.asset_info(self.asa_id)
+                return self.asa_delegate_authority_code_bytes == self._compile_asa_delegate_authority() and \
+                    self.asa_delegate_authority_address == algo_logic.address(self.asa_delegate_authority_code_bytes)
+
+            if step == 'deposit_fee_funds_to_asa_delegate_authority':
+                return self.client.account_info(self.asa_delegate_authority_address)['amount'] > 0
+
+            if step == 'change_asa_credentials':
+                asset_info = self.client.asset_info(self.asa_id)
+                return asset_info['params'].get('clawback') == self.asa_delegate_authority_address
+
+            if step == 'setup_algo_delegate_smart_contract':
+                self.client.application_info(self.app_id)
+                return self.algo_delegate_authority_code_bytes == self._compile_algo_delegate_authority() and \
+                    self.algo_delegate_authority_address == algo_logic.address(self.algo_delegate_authority_code_bytes)
+
+            if step == 'deposit_fee_funds_to_algo_delegate_authority':
+                return self.client.account_info(self.algo_delegate_authority_address)['amount'] > 0
+
+            if step == 'setup_app_delegates_authorities':
+                global_state = blockchain_utils.get_application_global_state(client=self.client, app_id=self.app_id)
+                return global_state.get(AppVariables.asaDelegateAddress) == \
+                    decode_address(self.asa_delegate_authority_address)
+        except algo_error.AlgodHTTPError as e:
+            if e.code == 404:
+                return False
+            raise
+
+        raise ValueError(f'Unknown initialization step: {step}')
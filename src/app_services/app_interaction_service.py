@@ -1,24 +1,33 @@
-from src.app_pyteal.app_source_code import DefaultValues
-from src.app_pyteal.asa_delegate_authority import asa_delegate_authority_logic
-from src.app_pyteal.algo_delegate_authority import algo_delegate_authority_logic
+import random
+import time
+
+from src.app_pyteal.app_variables import DefaultValues, AppVariables, AppActions
 
 import src.app_utils.blockchain_utils as blockchain_utils
 import src.app_utils.credentials as developer_credentials
-
-from pyteal import compileTeal, Mode
+from src.app_utils.app_artifacts import AppArtifact
+from src.app_utils.keyring import sign_transaction, address_from_private_key
 
 from algosdk import logic as algo_logic
 from algosdk.future import transaction as algo_txn
+from algosdk.encoding import encode_address
+from algosdk.v2client import algod
+from typing import List, Tuple
 
 
 class AppInteractionService:
+    max_biddings_per_group = 4
+    max_settlements_per_group = 8
 
     def __init__(self,
                  app_id: int,
                  asa_id: int,
                  current_owner_address: str,
                  current_highest_bid: int = DefaultValues.highestBid,
-                 teal_version: int = 3):
+                 teal_version: int = 3,
+                 artifact: AppArtifact = None,
+                 client: algod.AlgodClient = None,
+                 fee_pooling: bool = False):
         """
         Object that defines the interactions with the application.
         :param app_id: The app_id that will be interacted with.
@@ -26,16 +35,74 @@ class AppInteractionService:
         :param current_owner_address: The current owner of the NFT.
         :param current_highest_bid: The current highest bid.
         :param teal_version: the teal version.
+        :param artifact: The precompiled delegate authorities of the application. If it is not provided the delegate
+        authorities are compiled from their PyTeal source.
+        :param client: The client through which the service talks to the network. Defaults to the client configured in
+        config.yml, which is created when the first request is sent.
+        :param fee_pooling: If True the application was created for fee pooled groups, the bidder pays the fees of the
+        delegate authorities. It is taken from the artifact when one is provided.
         """
-        self.client = developer_credentials.get_client()
+        self._client = client
         self.app_id = app_id
         self.asa_id = asa_id
         self.current_owner_address = current_owner_address
         self.current_highest_bid = current_highest_bid
         self.teal_version = teal_version
+        self.fee_pooling = fee_pooling if artifact is None else artifact.fee_pooling
+
+        if artifact is None:
+            self._compile_delegate_authorities()
+        else:
+            if artifact.app_id != app_id or artifact.asa_id != asa_id:
+                raise ValueError('The artifact was created for a different application')
+
+            self.asa_delegate_authority_code_bytes = artifact.asa_delegate_authority_code_bytes
+            self.algo_delegate_authority_code_bytes = artifact.algo_delegate_authority_code_bytes
+
+        self.asa_delegate_authority_address = algo_logic.address(self.asa_delegate_authority_code_bytes)
+        self.algo_delegate_authority_address = algo_logic.address(self.algo_delegate_authority_code_bytes)
+
+    @property
+    def client(self) -> algod.AlgodClient:
+        if self._client is None:
+            self._client = developer_credentials.get_client()
+        return self._client
+
+    @classmethod
+    def from_artifact(cls,
+                      artifact_path: str,
+                      current_owner_address: str,
+                      current_highest_bid: int = DefaultValues.highestBid):
+        """
+        Creates the service from an artifact file exported by the AppInitializationService. PyTeal is not imported and
+        no TEAL is compiled, so bidder processes can start without any compile calls to the node.
+        :param artifact_path: The location of the artifact file.
+        :param current_owner_address: The current owner of the NFT.
+        :param current_highest_bid: The current highest bid.
+        :return:
+            AppInteractionService
+        """
+        artifact = AppArtifact.load(artifact_path)
+
+        return cls(app_id=artifact.app_id,
+                   asa_id=artifact.asa_id,
+                   current_owner_address=current_owner_address,
+                   current_highest_bid=current_highest_bid,
+                   teal_version=artifact.teal_version,
+                   artifact=artifact)
+
+    def _compile_delegate_authorities(self):
+        """
+        Compiles the delegate authorities of the application from their PyTeal source.
+        :return:
+        """
+        from pyteal import compileTeal, Mode
+        from src.app_pyteal.asa_delegate_authority import asa_delegate_authority_logic
+        from src.app_pyteal.algo_delegate_authority import algo_delegate_authority_logic
 
         asa_delegate_authority_compiled = compileTeal(asa_delegate_authority_logic(app_id=self.app_id,
-                                                                                   asa_id=self.asa_id),
+                                                                                   asa_id=self.asa_id,
+                                                                                   fee_pooling=self.fee_pooling),
                                                       mode=Mode.Signature,
                                                       version=self.teal_version)
 
@@ -43,9 +110,8 @@ class AppInteractionService:
             blockchain_utils.compile_program(client=self.client,
                                              source_code=asa_delegate_authority_compiled)
 
-        self.asa_delegate_authority_address = algo_logic.address(self.asa_delegate_authority_code_bytes)
-
-        algo_delegate_authority_compiled = compileTeal(algo_delegate_authority_logic(app_id=self.app_id),
+        algo_delegate_authority_compiled = compileTeal(algo_delegate_authority_logic(app_id=self.app_id,
+                                                                                     fee_pooling=self.fee_pooling),
                                                        mode=Mode.Signature,
                                                        version=self.teal_version)
 
@@ -53,21 +119,169 @@ class AppInteractionService:
             blockchain_utils.compile_program(client=self.client,
                                              source_code=algo_delegate_authority_compiled)
 
-        self.algo_delegate_authority_address = algo_logic.address(self.algo_delegate_authority_code_bytes)
+    def refresh_state(self):
+        """
+        Reads the current owner of the NFT and the current highest bid from the global state of the application.
+        :return:
+        """
+        global_state = blockchain_utils.get_application_global_state(client=self.client, app_id=self.app_id)
+
+        self.current_owner_address = encode_address(global_state[AppVariables.asaOwnerAddress])
+        self.current_highest_bid = global_state[AppVariables.highestBid]
 
     def execute_bidding(self,
                         bidder_private_key: str,
                         bidder_address: str,
-                        amount: int):
+                        amount: int,
+                        params: algo_txn.SuggestedParams = None):
         """
         Executing a bidding. If successful the NFT is transferred to the current bidder_address's while ALGOs bid
         by the previous bidder are refunded to him.
         :param bidder_private_key: The private key of the current bidder.
         :param bidder_address: The address of the current bidder.
         :param amount: The bid amount.
+        :param params: Suggested params for the transactions in the group. If not provided new ones are requested.
         :return:
+            The transaction id of the first transaction in the bidding group.
         """
-        params = blockchain_utils.get_default_suggested_params(client=self.client)
+        if params is None:
+            params = blockchain_utils.get_default_suggested_params(client=self.client)
+
+        self.opt_in_to_asa(bidder_private_key=bidder_private_key)
+
+        txid = self.submit_bidding(bidder_private_key=bidder_private_key,
+                                   bidder_address=bidder_address,
+                                   amount=amount,
+                                   params=params)
+
+        blockchain_utils.wait_for_confirmation(self.client, txid)
+
+        self.current_owner_address = bidder_address
+        self.current_highest_bid = amount
+
+        return txid
+
+    def opt_in_to_asa(self, bidder_private_key: str):
+        """
+        Opts the bidder in to the ASA of the application, which is needed before the ASA can be transferred to him.
+        :param bidder_private_key: The private key of the bidder.
+        :return:
+            The transaction id of the opt in.
+        """
+        return blockchain_utils.asa_opt_in(client=self.client,
+                                           sender_private_key=bidder_private_key,
+                                           asa_id=self.asa_id)
+
+    def submit_bidding(self,
+                       bidder_private_key: str,
+                       bidder_address: str,
+                       amount: int,
+                       params: algo_txn.SuggestedParams) -> str:
+        """
+        Builds the bidding group against the current owner and highest bid and submits it, without opting in to the
+        ASA and without waiting for the confirmation. The current owner and highest bid are not updated.
+        :param bidder_private_key: The private key of the current bidder, who has already opted in to the ASA.
+        :param bidder_address: The address of the current bidder.
+        :param amount: The bid amount.
+        :param params: Suggested params for the transactions in the group.
+        :return:
+            The transaction id of the first transaction in the bidding group.
+        """
+        signed_group = self.build_bidding_group(bidder_private_key=bidder_private_key,
+                                                bidder_address=bidder_address,
+                                                amount=amount,
+                                                params=params)
+
+        return blockchain_utils.send_transactions(client=self.client, signed_txns=signed_group)
+
+    def build_bidding_group(self,
+                            bidder_private_key: str,
+                            bidder_address: str,
+                            amount: int,
+                            params: algo_txn.SuggestedParams) -> List:
+        """
+        Builds and signs the atomic transfer of a bidding against the current owner and highest bid, without sending it.
+        With fee pooling the application call pays the fees of the whole group and the transactions of the delegate
+        authorities carry no fee. The ALGO delegate authority then holds no funds besides the highest bid, so the bid
+        needs to be at least the minimum balance of an account.
+        :param bidder_private_key: The private key of the current bidder.
+        :param bidder_address: The address of the current bidder.
+        :param amount: The bid amount.
+        :param params: Suggested params for the transactions in the group.
+        :return:
+            The 4 signed transactions of the group.
+        """
+        transactions = self._bidding_transactions(bidder_address=bidder_address, amount=amount, params=params)
+
+        # Atomic transfer
+        gid = algo_txn.calculate_group_id(transactions)
+        for txn in transactions:
+            txn.group = gid
+
+        return self._sign_bidding_transactions(transactions=transactions, bidder_private_key=bidder_private_key)
+
+    @staticmethod
+    def execute_biddings(biddings: List[Tuple['AppInteractionService', int]],
+                         bidder_private_key: str,
+                         bidder_address: str,
+                         params: algo_txn.SuggestedParams = None):
+        """
+        Executes the bids on up to 4 different applications in a single Atomic transfer, made of the 4 transactions of
+        every bid one after another. Either all of the bids succeed or none of them. The bidder opts in to all of the
+        ASAs with one group before.
+        :param biddings: The interaction service of every application with the amount bid on it.
+        :param bidder_private_key: The private key of the current bidder.
+        :param bidder_address: The address of the current bidder.
+        :param params: Suggested params for the transactions in the group. If not provided new ones are requested.
+        :return:
+            The transaction id of the first application call.
+        """
+        if not 0 < len(biddings) <= AppInteractionService.max_biddings_per_group:
+            raise ValueError(f'Between 1 and {AppInteractionService.max_biddings_per_group} bids can be executed in '
+                             f'one group')
+
+        if len({service.app_id for service, _ in biddings}) != len(biddings):
+            raise ValueError('Every bid in the group needs to be for a different application')
+
+        client = biddings[0][0].client
+        if params is None:
+            params = blockchain_utils.get_default_suggested_params(client=client)
+
+        blockchain_utils.asa_opt_ins(client=client,
+                                     sender_private_key=bidder_private_key,
+                                     asa_ids=[service.asa_id for service, _ in biddings])
+
+        bids_transactions = [service._bidding_transactions(bidder_address=bidder_address, amount=amount, params=params)
+                             for service, amount in biddings]
+        transactions = [txn for bid_transactions in bids_transactions for txn in bid_transactions]
+
+        # Atomic transfer
+        gid = algo_txn.calculate_group_id(transactions)
+        for txn in transactions:
+            txn.group = gid
+
+        signed_group = []
+        for (service, _), bid_transactions in zip(biddings, bids_transactions):
+            signed_group += service._sign_bidding_transactions(transactions=bid_transactions,
+                                                               bidder_private_key=bidder_private_key)
+
+        txid = blockchain_utils.send_transactions(client=client, signed_txns=signed_group)
+
+        blockchain_utils.wait_for_confirmation(client, txid)
+
+        for service, amount in biddings:
+            service.current_owner_address = bidder_address
+            service.current_highest_bid = amount
+
+        return txid
+
+    def _bidding_transactions(self,
+                              bidder_address: str,
+                              amount: int,
+                              params: algo_txn.SuggestedParams) -> List[algo_txn.Transaction]:
+        if self.fee_pooling and amount < blockchain_utils.MIN_ACCOUNT_BALANCE:
+            raise ValueError(f'With fee pooling the bid needs to be at least {blockchain_utils.MIN_ACCOUNT_BALANCE} '
+                             f'microAlgos')
 
         # 1. Application call txn
         bidding_app_call_txn = algo_txn.ApplicationCallTxn(sender=bidder_address,
@@ -87,11 +301,7 @@ class AppInteractionService:
                                               receiver=self.current_owner_address,
                                               amt=self.current_highest_bid)
 
-        # 4. Asa opt-in for the bidder & asset transfer transaction
-        blockchain_utils.asa_opt_in(client=self.client,
-                                    sender_private_key=bidder_private_key,
-                                    asa_id=self.asa_id)
-
+        # 4. Asset transfer transaction
         asa_transfer_txn = algo_txn.AssetTransferTxn(sender=self.asa_delegate_authority_address,
                                                      sp=params,
                                                      receiver=bidder_address,
@@ -99,19 +309,24 @@ class AppInteractionService:
                                                      index=self.asa_id,
                                                      revocation_target=self.current_owner_address)
 
-        # Atomic transfer
-        gid = algo_txn.calculate_group_id([bidding_app_call_txn,
-                                           biding_payment_txn,
-                                           algo_refund_txn,
-                                           asa_transfer_txn])
+        transactions = [bidding_app_call_txn,
+                        biding_payment_txn,
+                        algo_refund_txn,
+                        asa_transfer_txn]
+
+        # Every bid pays the fees of its own transactions, so bids with and without fee pooling can share a group.
+        if self.fee_pooling:
+            blockchain_utils.pool_fees(transactions)
 
-        bidding_app_call_txn.group = gid
-        biding_payment_txn.group = gid
-        algo_refund_txn.group = gid
-        asa_transfer_txn.group = gid
+        return transactions
 
-        bidding_app_call_txn_signed = bidding_app_call_txn.sign(bidder_private_key)
-        biding_payment_txn_signed = biding_payment_txn.sign(bidder_private_key)
+    def _sign_bidding_transactions(self,
+                                   transactions: List[algo_txn.Transaction],
+                                   bidder_private_key: str) -> List:
+        bidding_app_call_txn, biding_payment_txn, algo_refund_txn, asa_transfer_txn = transactions
+
+        bidding_app_call_txn_signed = sign_transaction(bidding_app_call_txn, bidder_private_key)
+        biding_payment_txn_signed = sign_transaction(biding_payment_txn, bidder_private_key)
 
         algo_refund_txn_logic_signature = algo_txn.LogicSig(self.algo_delegate_authority_code_bytes)
         algo_refund_txn_signed = algo_txn.LogicSigTransaction(algo_refund_txn, algo_refund_txn_logic_signature)
@@ -119,31 +334,146 @@ class AppInteractionService:
         asa_transfer_txn_logic_signature = algo_txn.LogicSig(self.asa_delegate_authority_code_bytes)
         asa_transfer_txn_signed = algo_txn.LogicSigTransaction(asa_transfer_txn, asa_transfer_txn_logic_signature)
 
-        signed_group = [bidding_app_call_txn_signed,
-                        biding_payment_txn_signed,
-                        algo_refund_txn_signed,
-                        asa_transfer_txn_signed]
+        return [bidding_app_call_txn_signed,
+                biding_payment_txn_signed,
+                algo_refund_txn_signed,
+                asa_transfer_txn_signed]
+
+    def execute_bidding_with_retries(self,
+                                     bidder_private_key: str,
+                                     bidder_address: str,
+                                     amount: int,
+                                     max_amount: int,
+                                     bid_increment: int,
+                                     max_retries: int = 5,
+                                     backoff_seconds: float = 0.5):
+        """
+        Executes a bidding and recovers when another bid has changed the global state before ours was evaluated. On a
+        logic rejection the owner and the highest bid are read again from the application, and the group is rebuilt
+        with a bid of at least the new highest bid + bid_increment and resubmitted after a jittered exponential
+        backoff. All of the attempts share the suggested params of the first one, so they are valid in the same
+        rounds.
+        :param bidder_private_key: The private key of the current bidder.
+        :param bidder_address: The address of the current bidder.
+        :param amount: The initial bid amount.
+        :param max_amount: The highest amount that the bidder is willing to bid.
+        :param bid_increment: The amount added on top of the highest bid when rebidding.
+        :param max_retries: The maximum number of resubmissions.
+        :param backoff_seconds: The base of the exponential backoff between the attempts.
+        :return:
+            The transaction id of the first transaction in the bidding group that was accepted.
+        """
+        if amount > max_amount:
+            raise ValueError(f'The bid of {amount} is higher than the maximum amount of {max_amount}')
 
-        txid = self.client.send_transactions(signed_group)
+        params = blockchain_utils.get_default_suggested_params(client=self.client)
 
-        blockchain_utils.wait_for_confirmation(self.client, txid)
+        # Only the bidding group is rebuilt and resubmitted, the bidder opts in to the ASA once.
+        self.opt_in_to_asa(bidder_private_key=bidder_private_key)
 
-        self.current_owner_address = bidder_address
-        self.current_highest_bid = amount
+        for attempt in range(max_retries + 1):
+            try:
+                txid = self.submit_bidding(bidder_private_key=bidder_private_key,
+                                           bidder_address=bidder_address,
+                                           amount=amount,
+                                           params=params)
+            except Exception as e:
+                if not blockchain_utils.is_logic_rejection(e) or attempt == max_retries:
+                    raise
+            else:
+                blockchain_utils.wait_for_confirmation(self.client, txid)
 
-    def pay_to_seller(self, asa_seller_address):
+                self.current_owner_address = bidder_address
+                self.current_highest_bid = amount
+
+                return txid
+
+            self.refresh_state()
+
+            amount = max(amount, self.current_highest_bid + bid_increment)
+            if amount > max_amount:
+                raise ValueError(f'The highest bid of {self.current_highest_bid} can not be outbid within the '
+                                 f'maximum amount of {max_amount}')
+
+            time.sleep(random.uniform(0, backoff_seconds * 2 ** attempt))
+
+            if self.client.status().get('last-round') >= params.last:
+                raise ValueError('The validity window of the bidding transactions has passed')
+
+    def pay_to_seller(self, asa_seller_address, payer_private_key: str = None):
         """
         Executes the Atomic transfer that pays to the seller of the ASA the highest bid of the ALGOs.
+        :param asa_seller_address: The address of the seller of the ASA.
+        :param payer_private_key: With fee pooling, the private key of the account that sends the application call and
+        pays the fees of the group, usually the seller. Without fee pooling the ALGO delegate authority pays the fees.
         :return:
+            The transaction id of the application call.
         """
+        return AppInteractionService.pay_to_sellers(settlements=[(self, asa_seller_address)],
+                                                    payer_private_key=payer_private_key)
 
-        params = blockchain_utils.get_default_suggested_params(client=self.client)
+    @staticmethod
+    def pay_to_sellers(settlements: List[Tuple['AppInteractionService', str]], payer_private_key: str = None):
+        """
+        Pays the highest bids of up to 8 applications to their sellers in a single Atomic transfer, made of one pair of
+        application call and payment per application.
+        :param settlements: The interaction service of every application with the address of its ASA seller.
+        :param payer_private_key: With fee pooling, the private key of the account that sends the application calls
+        and pays the fees of the whole group.
+        :return:
+            The transaction id of the first application call.
+        """
+        if not 0 < len(settlements) <= AppInteractionService.max_settlements_per_group:
+            raise ValueError(f'Between 1 and {AppInteractionService.max_settlements_per_group} applications can be '
+                             f'settled in one group')
 
-        # 1. Application call txn
-        bidding_app_call_txn = algo_txn.ApplicationCallTxn(sender=self.algo_delegate_authority_address,
+        fee_pooling = settlements[0][0].fee_pooling
+        if any(service.fee_pooling != fee_pooling for service, _ in settlements):
+            raise ValueError('Applications with and without fee pooling can not be settled in the same group')
+
+        if fee_pooling and payer_private_key is None:
+            raise ValueError('With fee pooling the payment to the seller needs a payer')
+
+        client = settlements[0][0].client
+        params = blockchain_utils.get_default_suggested_params(client=client)
+        payer_address = address_from_private_key(payer_private_key) if fee_pooling else None
+
+        transaction_pairs = [service._payment_to_seller_transactions(asa_seller_address=asa_seller_address,
+                                                                     params=params,
+                                                                     payer_address=payer_address)
+                             for service, asa_seller_address in settlements]
+        transactions = [txn for transaction_pair in transaction_pairs for txn in transaction_pair]
+
+        if fee_pooling:
+            blockchain_utils.pool_fees(transactions)
+
+        # Atomic transfer
+        gid = algo_txn.calculate_group_id(transactions)
+        for txn in transactions:
+            txn.group = gid
+
+        signed_group = []
+        for (service, _), transaction_pair in zip(settlements, transaction_pairs):
+            signed_group += service._sign_payment_to_seller_transactions(transaction_pair=transaction_pair,
+                                                                         payer_private_key=payer_private_key)
+
+        txid = blockchain_utils.send_transactions(client=client, signed_txns=signed_group)
+
+        blockchain_utils.wait_for_confirmation(client, txid)
+
+        return txid
+
+    def _payment_to_seller_transactions(self,
+                                        asa_seller_address: str,
+                                        params: algo_txn.SuggestedParams,
+                                        payer_address: str = None) -> List[algo_txn.Transaction]:
+        # 1. Application call txn, tagged as the payment to the seller. Without fee pooling it is sent by the ALGO
+        # delegate authority.
+        bidding_app_call_txn = algo_txn.ApplicationCallTxn(sender=payer_address or self.algo_delegate_authority_address,
                                                            sp=params,
                                                            index=self.app_id,
-                                                           on_complete=algo_txn.OnComplete.NoOpOC)
+                                                           on_complete=algo_txn.OnComplete.NoOpOC,
+                                                           app_args=[AppActions.paymentToSeller.encode()])
 
         # 2. Payment transaction
         algo_refund_txn = algo_txn.PaymentTxn(sender=self.algo_delegate_authority_address,
@@ -151,23 +481,22 @@ class AppInteractionService:
                                               receiver=asa_seller_address,
                                               amt=self.current_highest_bid)
 
-        # Atomic transfer
-        gid = algo_txn.calculate_group_id([bidding_app_call_txn,
-                                           algo_refund_txn])
+        return [bidding_app_call_txn, algo_refund_txn]
 
-        bidding_app_call_txn.group = gid
-        algo_refund_txn.group = gid
+    def _sign_payment_to_seller_transactions(self,
+                                             transaction_pair: List[algo_txn.Transaction],
+                                             payer_private_key: str = None) -> List:
+        bidding_app_call_txn, algo_refund_txn = transaction_pair
 
-        bidding_app_call_txn_logic_signature = algo_txn.LogicSig(self.algo_delegate_authority_code_bytes)
-        bidding_app_call_txn_signed = algo_txn.LogicSigTransaction(bidding_app_call_txn,
-                                                                   bidding_app_call_txn_logic_signature)
+        if self.fee_pooling:
+            bidding_app_call_txn_signed = sign_transaction(bidding_app_call_txn, payer_private_key)
+        else:
+            bidding_app_call_txn_logic_signature = algo_txn.LogicSig(self.algo_delegate_authority_code_bytes)
+            bidding_app_call_txn_signed = algo_txn.LogicSigTransaction(bidding_app_call_txn,
+                                                                       bidding_app_call_txn_logic_signature)
 
         algo_refund_txn_logic_signature = algo_txn.LogicSig(self.algo_delegate_authority_code_bytes)
         algo_refund_txn_signed = algo_txn.LogicSigTransaction(algo_refund_txn, algo_refund_txn_logic_signature)
 
-        signed_group = [bidding_app_call_txn_signed,
-                        algo_refund_txn_signed]
-
-        txid = self.client.send_transactions(signed_group)
-
-        blockchain_utils.wait_for_confirmation(self.client, txid)
+        return [bidding_app_call_txn_signed,
+                algo_refund_txn_signed]
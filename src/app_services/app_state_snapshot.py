@@ -0,0 +1,164 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+import numpy as np
+from algosdk import encoding
+from algosdk import error as algo_error
+from algosdk.v2client import algod
+
+import src.app_utils.blockchain_utils as blockchain_utils
+from src.app_pyteal.app_variables import AppVariables
+
+ADDRESS_LENGTH = 58
+
+
+class AppStateTable:
+    int_variables = [
+        AppVariables.highestBid,
+        AppVariables.appStartRound,
+        AppVariables.appEndRound,
+    ]
+
+    address_variables = [
+        AppVariables.asaSellerAddress,
+        AppVariables.asaOwnerAddress,
+        AppVariables.asaDelegateAddress,
+        AppVariables.algoDelegateAddress,
+    ]
+
+    def __init__(self,
+                 app_ids: List[int],
+                 first_round: int,
+                 last_round: int):
+        """
+        Columnar table with the global state of many bidding applications. Every global variable is a numpy array
+        named after its AppVariables name, with one row per application. An int variable that is not set in the global
+        state of an application is 0 and False in the is_set mask of the variable, an unset address is empty.
+        :param app_ids: The ids of the applications, one per row.
+        :param first_round: The last round of the network before the first application was read.
+        :param last_round: The last round of the network after the last application was read.
+        """
+        self.first_round = first_round
+        self.last_round = last_round
+
+        self.app_ids = np.array(app_ids, dtype=np.uint64)
+        self.rounds = np.full(len(app_ids), last_round, dtype=np.uint64)
+        self.exists = np.zeros(len(app_ids), dtype=bool)
+
+        self.columns = {}
+        self.is_set = {}
+        for variable in self.int_variables:
+            self.columns[variable] = np.zeros(len(app_ids), dtype=np.uint64)
+            self.is_set[variable] = np.zeros(len(app_ids), dtype=bool)
+        for variable in self.address_variables:
+            self.columns[variable] = np.full(len(app_ids), "", dtype=f"U{ADDRESS_LENGTH}")
+
+    @property
+    def is_consistent(self) -> bool:
+        """
+        :return:
+            Whether no block was added while the applications were read, so every row is the state at last_round.
+        """
+        return self.first_round == self.last_round
+
+    def __len__(self):
+        return len(self.app_ids)
+
+    def __getitem__(self, variable: str) -> np.ndarray:
+        return self.columns[variable]
+
+    def set_row(self, index: int, global_state: Optional[dict]):
+        """
+        :param index: The row of the application.
+        :param global_state: The decoded global state of the application or None if the application does not exist.
+        :return:
+        """
+        if global_state is None:
+            return
+
+        self.exists[index] = True
+
+        for variable in self.int_variables:
+            if variable in global_state:
+                self.columns[variable][index] = global_state[variable]
+                self.is_set[variable][index] = True
+        for variable in self.address_variables:
+            address_bytes = global_state.get(variable)
+            if address_bytes:
+                self.columns[variable][index] = encoding.encode_address(address_bytes)
+
+    def row(self, index: int) -> dict:
+        """
+        :param index: The row of the application.
+        :return:
+            The global state of the application as a dict keyed by the AppVariables names, with the app id and the
+            round at which it was read.
+        """
+        record = {
+            'app_id': int(self.app_ids[index]),
+            'round': int(self.rounds[index]),
+        }
+        for variable in self.int_variables:
+            record[variable] = int(self.columns[variable][index])
+        for variable in self.address_variables:
+            record[variable] = str(self.columns[variable][index])
+        return record
+
+    def active(self) -> np.ndarray:
+        """
+        :return:
+            Boolean mask of the applications in which bidding is still possible at the round of the table.
+        """
+        return self.exists & (self.columns[AppVariables.appEndRound] > self.rounds)
+
+
+class AppStateSnapshotReader:
+
+    def __init__(self,
+                 client: algod.AlgodClient,
+                 max_workers: int = 32,
+                 max_attempts: int = 3):
+        """
+        Reads the global state of many bidding applications concurrently. Use it with a PooledAlgodClient so that every
+        worker thread keeps reusing its own connection.
+        :param client: algorand client
+        :param max_workers: Number of concurrent application info requests.
+        :param max_attempts: How many times the applications are read again when a block was added while they were
+        being read. The last attempt is returned even if it is not consistent.
+        """
+        self.client = client
+        self.max_attempts = max_attempts
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def read(self, app_ids: List[int]) -> AppStateTable:
+        """
+        Reads the global state of all of the applications. The round of the network is read before and after the
+        applications, if it changed the read is repeated right away, which leaves almost a whole round for it.
+        :param app_ids: The ids of the applications.
+        :return:
+            AppStateTable
+        """
+        for attempt in range(self.max_attempts):
+            first_round = self.client.status()['last-round']
+            global_states = list(self.executor.map(self._read_global_state, app_ids))
+            last_round = self.client.status()['last-round']
+
+            if first_round == last_round:
+                break
+
+        table = AppStateTable(app_ids=app_ids, first_round=first_round, last_round=last_round)
+        for index, global_state in enumerate(global_states):
+            table.set_row(index, global_state)
+
+        return table
+
+    def _read_global_state(self, app_id: int) -> Optional[dict]:
+        try:
+            return blockchain_utils.get_application_global_state(client=self.client, app_id=app_id)
+        except algo_error.AlgodHTTPError as e:
+            if e.code == 404:
+                return None
+            raise
+
+    def close(self):
+        self.executor.shutdown()
@@ -0,0 +1,176 @@
+import threading
+import time
+from concurrent.futures import Future
+
+import src.app_utils.blockchain_utils as blockchain_utils
+from src.app_services.app_interaction_service import AppInteractionService
+
+
+class BidIntent:
+
+    def __init__(self,
+                 bidder_private_key: str,
+                 bidder_address: str,
+                 amount: int):
+        """
+        A bid that is waiting in the BidCoalescer to be submitted to the network.
+        :param bidder_private_key: The private key of the bidder.
+        :param bidder_address: The address of the bidder.
+        :param amount: The bid amount.
+        """
+        self.bidder_private_key = bidder_private_key
+        self.bidder_address = bidder_address
+        self.amount = amount
+        self.future = Future()
+
+
+class BidCoalescer:
+    # Pause of the background thread after a failed request to the node.
+    error_backoff_seconds = 1.0
+
+    def __init__(self, app_interaction_service: AppInteractionService):
+        """
+        Submission queue for a single bidding application. Within a round only one bidding group can change the
+        HighestBid, every other group fails the Gtxn[1].amount() > HighestBid check or its refund transaction does not
+        match the new global state. Because of that the coalescer keeps only the highest bid intent of the round and
+        forwards it to the network on flush, while the outbid intents are rejected locally without building a group.
+        The current owner and HighestBid of the app_interaction_service are read and updated under the lock of the
+        coalescer.
+        :param app_interaction_service: The service of the application for which the bids are coalesced.
+        """
+        self.app_interaction_service = app_interaction_service
+
+        self.lock = threading.Lock()
+        self.best_intent = None
+        # Bidders are opted in to the ASA when they queue their first bid, never in the flush.
+        self.opted_in_addresses = set()
+
+        self.is_running = False
+        self.round_thread = None
+
+    def submit_bid(self,
+                   bidder_private_key: str,
+                   bidder_address: str,
+                   amount: int) -> Future:
+        """
+        Queues a bid for the current round. The first bid of a bidder opts him in to the ASA before it is queued, which
+        blocks the caller until the opt in is confirmed.
+        :param bidder_private_key: The private key of the bidder.
+        :param bidder_address: The address of the bidder.
+        :param amount: The bid amount.
+        :return:
+            Future that resolves with the transaction id of the bidding group once the node has accepted it, or with
+            ValueError if the bid has been outbid before it was submitted.
+        """
+        intent = BidIntent(bidder_private_key=bidder_private_key,
+                           bidder_address=bidder_address,
+                           amount=amount)
+
+        with self.lock:
+            is_opted_in = bidder_address in self.opted_in_addresses
+
+        if not is_opted_in:
+            try:
+                self.app_interaction_service.opt_in_to_asa(bidder_private_key=bidder_private_key)
+            except Exception as e:
+                intent.future.set_exception(e)
+                return intent.future
+
+            with self.lock:
+                self.opted_in_addresses.add(bidder_address)
+
+        with self.lock:
+            highest_bid = self.app_interaction_service.current_highest_bid
+            if self.best_intent is not None:
+                highest_bid = max(highest_bid, self.best_intent.amount)
+
+            if amount <= highest_bid:
+                intent.future.set_exception(ValueError(f'The bid of {amount} is not higher than {highest_bid}'))
+                return intent.future
+
+            outbid_intent = self.best_intent
+            self.best_intent = intent
+
+        if outbid_intent is not None:
+            outbid_intent.future.set_exception(ValueError(f'The bid of {outbid_intent.amount} has been outbid by '
+                                                          f'{amount} before it was submitted'))
+
+        return intent.future
+
+    def flush(self):
+        """
+        Submits the highest bid intent of the round through the AppInteractionService without waiting for its
+        confirmation, the submission ledger keeps track of the status of the group. Once the node has accepted the group
+        the bid becomes the current owner and HighestBid, so the next round is coalesced against it. The intent is
+        rejected without being submitted if a bid that was accepted in the meantime already beats it.
+        :return:
+            The submitted BidIntent or None if there was nothing to submit.
+        """
+        with self.lock:
+            intent = self.best_intent
+            self.best_intent = None
+            current_highest_bid = self.app_interaction_service.current_highest_bid
+
+        if intent is None:
+            return None
+
+        if intent.amount <= current_highest_bid:
+            intent.future.set_exception(ValueError(f'The bid of {intent.amount} is not higher than '
+                                                   f'{current_highest_bid}'))
+            return None
+
+        try:
+            params = blockchain_utils.get_default_suggested_params(client=self.app_interaction_service.client)
+            txid = self.app_interaction_service.submit_bidding(bidder_private_key=intent.bidder_private_key,
+                                                               bidder_address=intent.bidder_address,
+                                                               amount=intent.amount,
+                                                               params=params)
+        except Exception as e:
+            intent.future.set_exception(e)
+        else:
+            with self.lock:
+                self.app_interaction_service.current_owner_address = intent.bidder_address
+                self.app_interaction_service.current_highest_bid = intent.amount
+            intent.future.set_result(txid)
+
+        return intent
+
+    def start(self):
+        """
+        Starts a background thread that flushes the queue once per round.
+        :return:
+        """
+        if self.is_running:
+            return
+
+        self.is_running = True
+        self.round_thread = threading.Thread(target=self._flush_every_round, daemon=True)
+        self.round_thread.start()
+
+    def stop(self):
+        """
+        Stops the background thread and submits the intent that is still waiting in the queue.
+        :return:
+        """
+        self.is_running = False
+        if self.round_thread is not None:
+            self.round_thread.join()
+            self.round_thread = None
+
+        self.flush()
+
+    def _flush_every_round(self):
+        client = self.app_interaction_service.client
+        last_round = None
+
+        while self.is_running:
+            # A failed request must not end the thread, the queued intents would never be resolved.
+            try:
+                if last_round is None:
+                    last_round = client.status().get('last-round')
+
+                last_round = client.status_after_block(last_round).get('last-round')
+                self.flush()
+            except Exception as e:
+                print(f'Flushing the bids of application {self.app_interaction_service.app_id} failed: {e}')
+                time.sleep(self.error_backoff_seconds)
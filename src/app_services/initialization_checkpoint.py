@@ -0,0 +1,78 @@
+import json
+import os
+import tempfile
+
+
+class InitializationCheckpoint:
+
+    def __init__(self, path: str):
+        """
+        Durable record of the initialization steps of a bidding application that have been completed, together with
+        the state of the AppInitializationService after the last completed step.
+        :param path: The location of the checkpoint file.
+        """
+        self.path = path
+        self.completed_steps = []
+        self.state = {}
+
+    @classmethod
+    def load(cls, path: str):
+        """
+        :param path: The location of the checkpoint file.
+        :return:
+            The stored checkpoint or an empty one if the file does not exist.
+        """
+        checkpoint = cls(path=path)
+
+        if os.path.exists(path):
+            with open(path) as file:
+                stored_checkpoint = json.load(file)
+
+            checkpoint.completed_steps = stored_checkpoint['completed_steps']
+            checkpoint.state = stored_checkpoint['state']
+
+        return checkpoint
+
+    def is_completed(self, step: str) -> bool:
+        return step in self.completed_steps
+
+    def mark_completed(self, step: str, state: dict):
+        """
+        Records a completed step and saves the checkpoint.
+        :param step: The name of the completed step.
+        :param state: The state of the service after the step.
+        :return:
+        """
+        if step not in self.completed_steps:
+            self.completed_steps.append(step)
+        self.state = state
+        self.save()
+
+    def keep_steps_before(self, step: str):
+        """
+        Forgets the given step and every step that was completed after it, so they are executed again.
+        :param step: The first step that needs to be executed again.
+        :return:
+        """
+        if step in self.completed_steps:
+            self.completed_steps = self.completed_steps[:self.completed_steps.index(step)]
+            self.save()
+
+    def save(self):
+        """
+        Writes the checkpoint to a temporary file that replaces the previous checkpoint, so a crash while writing never
+        leaves a partially written checkpoint behind.
+        :return:
+        """
+        directory = os.path.dirname(os.path.abspath(self.path))
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+
+        try:
+            with os.fdopen(file_descriptor, 'w') as file:
+                json.dump({'completed_steps': self.completed_steps, 'state': self.state}, file)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temporary_path, self.path)
+        except BaseException:
+            os.remove(temporary_path)
+            raise
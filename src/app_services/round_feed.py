@@ -0,0 +1,399 @@
+import re
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+from typing import List, Optional
+
+import numpy as np
+from algosdk import encoding
+from algosdk.v2client import algod
+
+from src.app_services.app_state_snapshot import ADDRESS_LENGTH, AppStateTable, AppStateSnapshotReader
+
+ROUND_FEED_MAGIC = b"ASRF"
+ROUND_FEED_VERSION = 2
+
+HEADER_DTYPE = np.dtype([
+    ('magic', 'S4'),
+    ('version', np.uint32),
+    ('max_apps', np.uint32),
+    ('app_count', np.uint32),
+    # Odd while the publisher is writing, incremented once more when the write is finished.
+    ('sequence', np.uint64),
+    ('round', np.uint64),
+    ('published_at', np.float64),
+    ('fee', np.uint64),
+    ('min_fee', np.uint64),
+    ('genesis_hash', 'S44'),
+    ('genesis_id', 'S64'),
+    ('consensus_version', 'S128'),
+    ('apps_first_round', np.uint64),
+    ('apps_last_round', np.uint64),
+], align=True)
+
+APP_DTYPE = np.dtype([('app_id', np.uint64), ('exists', np.bool_),
+                      ('int_is_set', np.bool_, (len(AppStateTable.int_variables),))] +
+                     [(variable, np.uint64) for variable in AppStateTable.int_variables] +
+                     [(variable, f'S{ADDRESS_LENGTH}') for variable in AppStateTable.address_variables],
+                     align=True)
+
+
+def _segment_size(max_apps: int) -> int:
+    return HEADER_DTYPE.itemsize + max_apps * APP_DTYPE.itemsize
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    # Only the publisher owns the segment. The resource tracker of a reader process would otherwise unlink it when the
+    # reader exits.
+    segment = shared_memory.SharedMemory(name=name)
+    resource_tracker.unregister(segment._name, 'shared_memory')
+    return segment
+
+
+class RoundFeedSnapshot:
+
+    def __init__(self, header: np.void, apps: np.ndarray):
+        """
+        A consistent copy of everything that was published in one round.
+        :param header: The header record of the segment.
+        :param apps: The application records of the segment, empty if they were not copied.
+        """
+        self.header = header
+        self.apps = apps
+        self.app_indexes = None
+
+    @property
+    def round(self) -> int:
+        return int(self.header['round'])
+
+    @property
+    def age(self) -> float:
+        """
+        :return:
+            Seconds since the snapshot was published.
+        """
+        return time.time() - float(self.header['published_at'])
+
+    def status(self) -> dict:
+        """
+        :return:
+            The published round in the format of the algod status response.
+        """
+        return {
+            'last-round': self.round,
+            'time-since-last-round': max(0, int(self.age * 1e9)),
+            'catchup-time': 0,
+        }
+
+    def suggested_params(self) -> dict:
+        """
+        :return:
+            The published suggested params in the format of the algod transaction params response.
+        """
+        return {
+            'fee': int(self.header['fee']),
+            'min-fee': int(self.header['min_fee']),
+            'last-round': self.round,
+            'genesis-hash': self.header['genesis_hash'].decode(),
+            'genesis-id': self.header['genesis_id'].decode(),
+            'consensus-version': self.header['consensus_version'].decode(),
+        }
+
+    def global_state(self, app_id: int) -> Optional[dict]:
+        """
+        :param app_id: The application id.
+        :return:
+            The decoded global state of the application like blockchain_utils.get_application_global_state returns it,
+            or None if the application is not in the feed or does not exist.
+        """
+        if self.app_indexes is None:
+            self.app_indexes = {int(app_id): index for index, app_id in enumerate(self.apps['app_id'])}
+
+        index = self.app_indexes.get(app_id)
+        if index is None or not self.apps['exists'][index]:
+            return None
+
+        app = self.apps[index]
+        global_state = {variable: int(app[variable])
+                        for variable, is_set in zip(AppStateTable.int_variables, app['int_is_set']) if is_set}
+        for variable in AppStateTable.address_variables:
+            if app[variable]:
+                global_state[variable] = encoding.decode_address(app[variable].decode())
+
+        return global_state
+
+
+class RoundFeedPublisher:
+
+    def __init__(self,
+                 client: algod.AlgodClient,
+                 name: str,
+                 app_ids: List[int] = (),
+                 snapshot_reader: AppStateSnapshotReader = None):
+        """
+        Follows the rounds of the network and publishes the round, the suggested params and the global state of the
+        applications in a shared memory segment after every block, so bidder processes on the same machine can read
+        them without sending any request. Only one process publishes to a segment.
+        :param client: algorand client, not a RoundFeedAlgodClient.
+        :param name: The name of the shared memory segment. An existing segment with the same name is an error.
+        :param app_ids: The applications whose global state is published.
+        :param snapshot_reader: Reads the global state of the applications. Defaults to an AppStateSnapshotReader over
+        the client.
+        """
+        self.client = client
+        self.app_ids = list(app_ids)
+        self.snapshot_reader = snapshot_reader or AppStateSnapshotReader(client=client)
+
+        self.segment = shared_memory.SharedMemory(name=name, create=True, size=_segment_size(len(self.app_ids)))
+        self.header = np.ndarray(shape=(), dtype=HEADER_DTYPE, buffer=self.segment.buf)
+        self.apps = np.ndarray(shape=(len(self.app_ids),), dtype=APP_DTYPE, buffer=self.segment.buf,
+                               offset=HEADER_DTYPE.itemsize)
+
+        self.header['magic'] = ROUND_FEED_MAGIC
+        self.header['version'] = ROUND_FEED_VERSION
+        self.header['max_apps'] = len(self.app_ids)
+
+    def publish(self, round_number: int):
+        """
+        Reads the suggested params and the applications and publishes them for the given round.
+        :param round_number: The last round of the network.
+        :return:
+        """
+        params = self.client.algod_request("GET", "/transactions/params")
+        table = self.snapshot_reader.read(self.app_ids) if self.app_ids else None
+
+        # The applications can be read at a later round than the one that was awaited.
+        if table is not None:
+            round_number = max(round_number, table.last_round)
+
+        self.header['sequence'] += 1
+
+        self.header['round'] = round_number
+        self.header['published_at'] = time.time()
+        self.header['fee'] = params['fee']
+        self.header['min_fee'] = params.get('min-fee', 0)
+        self.header['genesis_hash'] = params['genesis-hash'].encode()
+        self.header['genesis_id'] = params['genesis-id'].encode()
+        self.header['consensus_version'] = params['consensus-version'].encode()
+
+        if table is not None:
+            self.apps['app_id'] = table.app_ids
+            self.apps['exists'] = table.exists
+            self.apps['int_is_set'] = np.stack([table.is_set[variable] for variable in AppStateTable.int_variables],
+                                               axis=1)
+            for variable in AppStateTable.int_variables:
+                self.apps[variable] = table[variable]
+            for variable in AppStateTable.address_variables:
+                self.apps[variable] = np.char.encode(table[variable], 'ascii')
+
+            self.header['apps_first_round'] = table.first_round
+            self.header['apps_last_round'] = table.last_round
+            self.header['app_count'] = len(table)
+
+        self.header['sequence'] += 1
+
+    def run(self, stop_event: threading.Event = None):
+        """
+        Publishes the current round and then every following round, until the stop event is set.
+        :param stop_event: Stops the feed when set. The feed runs forever without it.
+        :return:
+        """
+        round_number = self.client.status()['last-round']
+        self.publish(round_number)
+
+        while stop_event is None or not stop_event.is_set():
+            status = self.client.status_after_block(round_number)
+            if status['last-round'] > round_number:
+                round_number = status['last-round']
+                self.publish(round_number)
+
+    def close(self):
+        """
+        Closes and removes the shared memory segment.
+        :return:
+        """
+        self.snapshot_reader.close()
+        del self.header, self.apps
+        self.segment.close()
+        self.segment.unlink()
+
+
+class RoundFeedReader:
+
+    def __init__(self, name: str, poll_interval: float = 0.005, max_read_seconds: float = 0.1):
+        """
+        Reads the shared memory segment of a RoundFeedPublisher. The reads never block the publisher, a read that
+        overlaps a publish is repeated for up to max_read_seconds. After that the read gives up, e.g. because the
+        publisher died in the middle of a publish.
+        :param name: The name of the shared memory segment.
+        :param poll_interval: Seconds between two checks of the round while waiting for a new one.
+        :param max_read_seconds: For how long a read that overlaps a publish is repeated.
+        """
+        self.poll_interval = poll_interval
+        self.max_read_seconds = max_read_seconds
+
+        # Row of every application, for the publish with the sequence number app_indexes_sequence.
+        self.app_indexes = {}
+        self.app_indexes_sequence = None
+
+        self.segment = _attach(name)
+        self.header = np.ndarray(shape=(), dtype=HEADER_DTYPE, buffer=self.segment.buf)
+
+        if self.header['magic'] != ROUND_FEED_MAGIC or self.header['version'] != ROUND_FEED_VERSION:
+            raise ValueError(f'{name} is not a round feed segment')
+
+        self.apps = np.ndarray(shape=(int(self.header['max_apps']),), dtype=APP_DTYPE, buffer=self.segment.buf,
+                               offset=HEADER_DTYPE.itemsize)
+
+    @property
+    def round(self) -> int:
+        """
+        :return:
+            The last published round, 0 before the first publish.
+        """
+        return int(self.header['round'])
+
+    def snapshot(self, with_apps: bool = True) -> Optional[RoundFeedSnapshot]:
+        """
+        :param with_apps: If False only the round and the suggested params are copied.
+        :return:
+            A consistent copy of the last publish, None before the first publish or if no consistent copy could be
+            made within max_read_seconds.
+        """
+        def copy_apps(sequence: int, app_count: int):
+            return self.apps[:app_count if with_apps else 0].copy(), None
+
+        return self._consistent_read(copy_apps)
+
+    def app_snapshot(self, app_id: int) -> Optional[RoundFeedSnapshot]:
+        """
+        Like snapshot, but only the record of the given application is copied.
+        :param app_id: The application id.
+        :return:
+            RoundFeedSnapshot whose apps are empty if the application is not in the feed.
+        """
+        def copy_apps(sequence: int, app_count: int):
+            app_indexes = self.app_indexes
+            if self.app_indexes_sequence != sequence:
+                app_indexes = {int(published_app_id): index
+                               for index, published_app_id in enumerate(self.apps['app_id'][:app_count])}
+
+            index = app_indexes.get(app_id)
+            apps = self.apps[0:0] if index is None else self.apps[index:index + 1]
+            return apps.copy(), app_indexes
+
+        return self._consistent_read(copy_apps)
+
+    def _consistent_read(self, copy_apps) -> Optional[RoundFeedSnapshot]:
+        deadline = time.monotonic() + self.max_read_seconds
+
+        while True:
+            sequence = int(self.header['sequence'])
+            if sequence == 0:
+                return None
+
+            if sequence % 2 == 0:
+                header = self.header.copy()
+                apps, app_indexes = copy_apps(sequence, int(header['app_count']))
+
+                if int(self.header['sequence']) == sequence:
+                    # The index is kept only once it was built from a consistent copy.
+                    if app_indexes is not None:
+                        self.app_indexes, self.app_indexes_sequence = app_indexes, sequence
+                    return RoundFeedSnapshot(header=header[()], apps=apps)
+
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(0)
+
+    def wait_for_round_after(self,
+                             round_number: int,
+                             timeout: float = None,
+                             with_apps: bool = True) -> Optional[RoundFeedSnapshot]:
+        """
+        Waits until a round after the given one is published, like status_after_block of the algod client.
+        :param round_number: The round after which the feed is awaited.
+        :param timeout: Seconds after which the last publish is returned even if no new round was published.
+        :param with_apps: If False only the round and the suggested params are copied.
+        :return:
+            The first snapshot of a later round or the last one after the timeout.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while self.round <= round_number:
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            time.sleep(self.poll_interval)
+
+        return self.snapshot(with_apps=with_apps)
+
+    def close(self):
+        del self.header, self.apps
+        self.segment.close()
+
+
+class RoundFeedAlgodClient(algod.AlgodClient):
+    # algod returns from the wait after about a minute even if no block was added.
+    wait_for_block_timeout = 60
+
+    def __init__(self,
+                 client: algod.AlgodClient,
+                 reader: RoundFeedReader,
+                 max_age: float = 30):
+        """
+        Algod client that serves the status, the waits for a block and the suggested params from a RoundFeedReader.
+        The global state of the published applications is served by application_global_state, which
+        blockchain_utils.get_application_global_state uses. Every other request, including application_info, is executed
+        with the given client, and so are all of the requests while nothing was published for max_age seconds, e.g.
+        before the first publish or after the publisher has stopped.
+        :param client: The client that executes the requests that are not served from the feed.
+        :param reader: The reader of the round feed.
+        :param max_age: Seconds after which the last publish is too old to be served.
+        """
+        super().__init__(client.algod_token, client.algod_address, client.headers)
+        self.client = client
+        self.reader = reader
+        self.max_age = max_age
+
+    def algod_request(self, method, requrl, params=None, data=None, headers=None, response_format="json"):
+        if method == "GET" and response_format == "json":
+            response = self._feed_response(requrl)
+            if response is not None:
+                return response
+
+        return self.client.algod_request(method, requrl, params=params, data=data, headers=headers,
+                                         response_format=response_format)
+
+    def application_global_state(self, app_id: int) -> Optional[dict]:
+        """
+        :param app_id: The application id.
+        :return:
+            The published global state of the application like blockchain_utils.get_application_global_state returns
+            it, or None if it is not served from the feed.
+        """
+        snapshot = self._fresh(self.reader.app_snapshot(app_id))
+        return None if snapshot is None else snapshot.global_state(app_id)
+
+    def _fresh(self, snapshot: Optional[RoundFeedSnapshot]) -> Optional[RoundFeedSnapshot]:
+        if snapshot is None or snapshot.age > self.max_age:
+            return None
+        return snapshot
+
+    def _feed_response(self, requrl) -> Optional[dict]:
+        if requrl == "/status":
+            snapshot = self._fresh(self.reader.snapshot(with_apps=False))
+            return None if snapshot is None else snapshot.status()
+
+        if requrl == "/transactions/params":
+            snapshot = self._fresh(self.reader.snapshot(with_apps=False))
+            return None if snapshot is None else snapshot.suggested_params()
+
+        match = re.fullmatch(r"/status/wait-for-block-after/(\d+)", requrl)
+        if match and self._fresh(self.reader.snapshot(with_apps=False)) is not None:
+            # The publisher can stop while we wait, then the node is asked instead.
+            snapshot = self._fresh(self.reader.wait_for_round_after(int(match.group(1)),
+                                                                    timeout=self.wait_for_block_timeout,
+                                                                    with_apps=False))
+            return None if snapshot is None else snapshot.status()
+
+        return None
@@ -0,0 +1,401 @@
+import numpy as np
+
+from src.app_pyteal.app_variables import DefaultValues
+
+
+class BidderPopulation:
+
+    def __init__(self,
+                 number_of_bidders: int = 8,
+                 valuation_median: int = 5000000,
+                 valuation_sigma: float = 0.5,
+                 bid_increment: int = 100000,
+                 bid_probability: float = 0.1,
+                 sniper_fraction: float = 0.0,
+                 sniper_window: int = 3):
+        """
+        Describes the bidders that compete in every simulated auction.
+        :param number_of_bidders: Number of bidders in each auction.
+        :param valuation_median: Median of the log-normal distribution of the bidders' private valuations in
+        microAlgos. A bidder never bids above its valuation.
+        :param valuation_sigma: Sigma of the log-normal valuation distribution.
+        :param bid_increment: Amount in microAlgos that a bidder adds on top of the highest bid it has observed.
+        :param bid_probability: Probability that an idle, outbid bidder decides to bid in a given round.
+        :param sniper_fraction: Fraction of the bidders that only bid in the last sniper_window rounds of the auction.
+        :param sniper_window: Number of rounds before the end round in which the snipers are bidding in every round.
+        """
+        self.number_of_bidders = number_of_bidders
+        self.valuation_median = valuation_median
+        self.valuation_sigma = valuation_sigma
+        self.bid_increment = bid_increment
+        self.bid_probability = bid_probability
+        self.sniper_fraction = sniper_fraction
+        self.sniper_window = sniper_window
+
+    def sample_valuations(self, rng: np.random.Generator, number_of_auctions: int):
+        """
+        :return:
+            int64 array with shape (number_of_auctions, number_of_bidders) of private valuations.
+        """
+        valuations = rng.lognormal(mean=np.log(self.valuation_median),
+                                   sigma=self.valuation_sigma,
+                                   size=(number_of_auctions, self.number_of_bidders))
+        return valuations.astype(np.int64)
+
+    def sample_snipers(self, rng: np.random.Generator, number_of_auctions: int):
+        """
+        :return:
+            bool array with shape (number_of_auctions, number_of_bidders) that marks the snipers.
+        """
+        return rng.random((number_of_auctions, self.number_of_bidders)) < self.sniper_fraction
+
+
+class LatencyDistribution:
+    CONSTANT = "constant"
+    EXPONENTIAL = "exponential"
+    LOGNORMAL = "lognormal"
+
+    def __init__(self,
+                 kind: str = LOGNORMAL,
+                 mean: float = 1.0,
+                 sigma: float = 0.5):
+        """
+        Distribution of the time in seconds between a bidder observing the application state and its bidding group
+        reaching the block proposer. It covers building and signing the group, the HTTP call to algod and the gossip.
+        :param kind: One of constant, exponential or lognormal.
+        :param mean: Mean latency in seconds.
+        :param sigma: Sigma of the underlying normal distribution, used only by the lognormal kind.
+        """
+        if kind not in (self.CONSTANT, self.EXPONENTIAL, self.LOGNORMAL):
+            raise ValueError(f'Unknown latency distribution: {kind}')
+
+        self.kind = kind
+        self.mean = mean
+        self.sigma = sigma
+
+    def sample(self, rng: np.random.Generator, size: int):
+        """
+        :return:
+            float array of latencies in seconds.
+        """
+        if self.kind == self.CONSTANT:
+            return np.full(size, self.mean)
+        if self.kind == self.EXPONENTIAL:
+            return rng.exponential(scale=self.mean, size=size)
+
+        mu = np.log(self.mean) - self.sigma ** 2 / 2
+        return rng.lognormal(mean=mu, sigma=self.sigma, size=size)
+
+
+class RoundTiming:
+
+    def __init__(self,
+                 app_duration: int = 150,
+                 round_time: float = 4.5,
+                 reserve_price: int = DefaultValues.highestBid):
+        """
+        Timing and pricing parameters of the simulated application. They mirror the arguments that are given to the
+        AppInitializationService.
+        :param app_duration: The number of rounds that the bidding is open. A group is accepted only if it is confirmed
+        in a round that is smaller or equal to appStartRound + app_duration.
+        :param round_time: Average time of a round in seconds.
+        :param reserve_price: The initial HighestBid. The first accepted bid needs to be strictly bigger than it.
+        """
+        self.app_duration = app_duration
+        self.round_time = round_time
+        self.reserve_price = reserve_price
+
+
+class SimulationReport:
+
+    def __init__(self,
+                 number_of_auctions: int,
+                 prices: np.ndarray,
+                 contention_losses: np.ndarray,
+                 ideal_prices: np.ndarray,
+                 submitted_groups: int,
+                 confirmed_groups: int,
+                 outbid_failed_groups: int,
+                 late_failed_groups: int,
+                 refunded_amount: int):
+        """
+        Aggregated outcome of the simulated auctions.
+        :param number_of_auctions: Number of simulated auctions.
+        :param prices: Final HighestBid of every sold auction.
+        :param contention_losses: Difference between the price of an auction without any latency and the realized
+        price, for every auction that would have been sold without latency.
+        :param ideal_prices: The prices without any latency of the same auctions as in contention_losses.
+        :param submitted_groups: Number of submitted bidding groups.
+        :param confirmed_groups: Number of bidding groups that passed the approval program.
+        :param outbid_failed_groups: Number of groups rejected because another bid changed HighestBid and
+        ASAOwnerAddress after the group was built, so the refund transaction no longer matched the global state.
+        :param late_failed_groups: Number of groups that reached the network after the end round.
+        :param refunded_amount: Total microAlgos refunded by the ALGO delegate authority to outbid owners.
+        """
+        self.number_of_auctions = number_of_auctions
+        self.prices = prices
+        self.contention_losses = contention_losses
+        self.ideal_prices = ideal_prices
+        self.submitted_groups = submitted_groups
+        self.confirmed_groups = confirmed_groups
+        self.outbid_failed_groups = outbid_failed_groups
+        self.late_failed_groups = late_failed_groups
+        self.refunded_amount = refunded_amount
+
+    @property
+    def sold_rate(self):
+        return len(self.prices) / self.number_of_auctions if self.number_of_auctions else 0.0
+
+    @property
+    def failed_group_rate(self):
+        failed_groups = self.outbid_failed_groups + self.late_failed_groups
+        return failed_groups / self.submitted_groups if self.submitted_groups else 0.0
+
+    @property
+    def outbid_failed_group_rate(self):
+        return self.outbid_failed_groups / self.submitted_groups if self.submitted_groups else 0.0
+
+    @property
+    def late_failed_group_rate(self):
+        return self.late_failed_groups / self.submitted_groups if self.submitted_groups else 0.0
+
+    def summary(self):
+        """
+        :return:
+            dict with the headline metrics of the simulation.
+        """
+        has_prices = len(self.prices) > 0
+        has_losses = len(self.contention_losses) > 0
+
+        return {
+            'number_of_auctions': self.number_of_auctions,
+            'sold_rate': self.sold_rate,
+            'mean_price': float(self.prices.mean()) if has_prices else 0.0,
+            'price_p5': float(np.percentile(self.prices, 5)) if has_prices else 0.0,
+            'price_p50': float(np.percentile(self.prices, 50)) if has_prices else 0.0,
+            'price_p95': float(np.percentile(self.prices, 95)) if has_prices else 0.0,
+            'mean_contention_loss': float(self.contention_losses.mean()) if has_losses else 0.0,
+            'relative_contention_loss':
+                float(self.contention_losses.sum() / self.ideal_prices.sum()) if has_losses else 0.0,
+            'submitted_groups_per_auction':
+                self.submitted_groups / self.number_of_auctions if self.number_of_auctions else 0.0,
+            'failed_group_rate': self.failed_group_rate,
+            'outbid_failed_group_rate': self.outbid_failed_group_rate,
+            'late_failed_group_rate': self.late_failed_group_rate,
+            'refunded_amount_per_auction':
+                self.refunded_amount / self.number_of_auctions if self.number_of_auctions else 0.0,
+        }
+
+
+def _bernoulli_indices(rng: np.random.Generator, size: int, probability: float):
+    """
+    Indices of the successes of size independent Bernoulli trials. The gaps between successes are geometric, so the
+    cost is proportional to the number of successes instead of size.
+    :return:
+        Sorted int64 array of indices in [0, size).
+    """
+    if probability <= 0:
+        return np.empty(0, dtype=np.int64)
+    if probability >= 1:
+        return np.arange(size, dtype=np.int64)
+
+    expected = size * probability
+    number_of_draws = int(expected + 6 * np.sqrt(expected) + 16)
+
+    indices = np.cumsum(rng.geometric(probability, size=number_of_draws)) - 1
+    while indices[-1] < size:
+        gaps = rng.geometric(probability, size=number_of_draws)
+        indices = np.concatenate([indices, indices[-1] + np.cumsum(gaps)])
+
+    return indices[:np.searchsorted(indices, size)]
+
+
+def _ideal_prices(valuations: np.ndarray, bid_increment: int, reserve_price: int):
+    """
+    Price of an ascending auction without latency: the bidder with the highest valuation wins for the second highest
+    valuation plus one increment, but never above its own valuation. The opening bid is reserve_price + bid_increment.
+    :return:
+        Tuple of the ideal prices and a bool mask of the auctions that are sold without latency.
+    """
+    opening_bid = reserve_price + bid_increment
+    sorted_valuations = np.sort(valuations, axis=1)
+    highest = sorted_valuations[:, -1]
+    second = sorted_valuations[:, -2] if valuations.shape[1] > 1 else np.zeros_like(highest)
+
+    is_sold = highest >= opening_bid
+    prices = np.minimum(highest, np.maximum(second + bid_increment, opening_bid))
+
+    return prices, is_sold
+
+
+def _simulate_chunk(rng: np.random.Generator,
+                    number_of_auctions: int,
+                    population: BidderPopulation,
+                    latency: LatencyDistribution,
+                    timing: RoundTiming):
+    """
+    Runs number_of_auctions independent auctions round by round. Every (auction, bidder) pair has at most one group in
+    flight, because execute_bidding waits for the confirmation before the bidder can bid again. In every round:
+        1. The groups that reach the network in that round are evaluated in a random order. The first group that was
+        built against the current HighestBid/ASAOwnerAddress is accepted, the refund transaction of the others does not
+        match the updated global state anymore so they are rejected.
+        2. Idle bidders that are not the current owner and can afford HighestBid + bid_increment decide to bid against
+        the state that they observe and their group lands after a sampled latency.
+    Groups that land after the end round are rejected by the Global.round() <= appEndRound check.
+    :return:
+        dict with the per auction results and the group counters of the chunk.
+    """
+    number_of_bidders = population.number_of_bidders
+    end_round = timing.app_duration
+
+    valuations = population.sample_valuations(rng, number_of_auctions)
+    snipers = population.sample_snipers(rng, number_of_auctions)
+    flat_valuations = valuations.ravel()
+    flat_snipers = snipers.ravel()
+    sniper_indices = np.flatnonzero(flat_snipers)
+
+    highest_bid = np.full(number_of_auctions, timing.reserve_price, dtype=np.int64)
+    owner = np.full(number_of_auctions, -1, dtype=np.int64)
+    state_version = np.zeros(number_of_auctions, dtype=np.int64)
+    refunded_amount = np.zeros(number_of_auctions, dtype=np.int64)
+
+    # The group in flight of every (auction, bidder) pair, flattened to auction * number_of_bidders + bidder
+    flat_pending_round = np.full(number_of_auctions * number_of_bidders, -1, dtype=np.int64)
+    flat_pending_amount = np.zeros(number_of_auctions * number_of_bidders, dtype=np.int64)
+    flat_pending_version = np.zeros(number_of_auctions * number_of_bidders, dtype=np.int64)
+
+    submitted_groups = 0
+    confirmed_groups = 0
+    outbid_failed_groups = 0
+
+    for current_round in range(end_round + 1):
+        # 1. Groups confirmed in the current round. The groups of an auction are evaluated in a random order, so a
+        # uniformly chosen fresh group is the one that is accepted.
+        landing = np.flatnonzero(flat_pending_round == current_round)
+
+        if len(landing) > 0:
+            landing_auctions = landing // number_of_bidders
+            is_fresh = flat_pending_version[landing] == state_version[landing_auctions]
+
+            fresh = landing[is_fresh]
+            fresh_auctions = landing_auctions[is_fresh]
+            is_first_of_auction = np.empty(len(fresh), dtype=bool)
+            is_first_of_auction[:1] = True
+            is_first_of_auction[1:] = fresh_auctions[1:] != fresh_auctions[:-1]
+
+            first_fresh = np.flatnonzero(is_first_of_auction)
+            fresh_per_auction = np.diff(np.append(first_fresh, len(fresh)))
+            chosen = first_fresh + (rng.random(len(first_fresh)) * fresh_per_auction).astype(np.int64)
+
+            auctions_with_winner = fresh_auctions[first_fresh]
+            winners = fresh[chosen]
+
+            had_owner = owner[auctions_with_winner] >= 0
+            refunded_amount[auctions_with_winner] += np.where(had_owner, highest_bid[auctions_with_winner], 0)
+
+            highest_bid[auctions_with_winner] = flat_pending_amount[winners]
+            owner[auctions_with_winner] = winners % number_of_bidders
+            state_version[auctions_with_winner] += 1
+
+            confirmed_groups += len(auctions_with_winner)
+            outbid_failed_groups += len(landing) - len(auctions_with_winner)
+            flat_pending_round[landing] = -1
+
+        # 2. New bids built against the state observed in the current round
+        is_in_sniper_window = end_round - current_round < population.sniper_window
+        active = _bernoulli_indices(rng, number_of_auctions * number_of_bidders, population.bid_probability)
+        active = active[~flat_snipers[active]]
+        if is_in_sniper_window:
+            active = np.concatenate([active, sniper_indices])
+
+        active_auctions = active // number_of_bidders
+        next_amount = highest_bid[active_auctions] + population.bid_increment
+        is_bidding = ((flat_pending_round[active] < 0) &
+                      (active % number_of_bidders != owner[active_auctions]) &
+                      (flat_valuations[active] >= next_amount))
+
+        bidding = active[is_bidding]
+        number_of_bids = len(bidding)
+
+        if number_of_bids > 0:
+            observed_at = rng.random(number_of_bids) * timing.round_time
+            delay = latency.sample(rng, number_of_bids)
+            rounds_in_flight = np.floor((observed_at + delay) / timing.round_time).astype(np.int64)
+
+            flat_pending_round[bidding] = current_round + 1 + rounds_in_flight
+            flat_pending_amount[bidding] = next_amount[is_bidding]
+            flat_pending_version[bidding] = state_version[active_auctions[is_bidding]]
+
+            submitted_groups += number_of_bids
+
+    late_failed_groups = int((flat_pending_round >= 0).sum())
+
+    is_sold = owner >= 0
+    ideal_prices, is_sold_ideally = _ideal_prices(valuations, population.bid_increment, timing.reserve_price)
+    realized_prices = np.where(is_sold, highest_bid, 0)
+
+    return {
+        'prices': highest_bid[is_sold],
+        'contention_losses': (ideal_prices - realized_prices)[is_sold_ideally],
+        'ideal_prices': ideal_prices[is_sold_ideally],
+        'submitted_groups': submitted_groups,
+        'confirmed_groups': confirmed_groups,
+        'outbid_failed_groups': outbid_failed_groups,
+        'late_failed_groups': late_failed_groups,
+        'refunded_amount': int(refunded_amount.sum()),
+    }
+
+
+def simulate_auctions(number_of_auctions: int,
+                      population: BidderPopulation = None,
+                      latency: LatencyDistribution = None,
+                      timing: RoundTiming = None,
+                      seed: int = None,
+                      chunk_size: int = 100000) -> SimulationReport:
+    """
+    Simulates the outcome of many independent bidding applications with the rules of the approval program:
+        - a bid is accepted only if amount > HighestBid,
+        - a bid is accepted only until appEndRound,
+        - every accepted bid refunds the previous HighestBid to the previous owner, so the group is valid only against
+        the exact global state that it was built for.
+    The auctions are simulated in chunks of chunk_size so the memory usage stays bounded for millions of auctions.
+    :param number_of_auctions: Number of auctions to simulate.
+    :param population: The bidders in every auction.
+    :param latency: The latency of every submitted group.
+    :param timing: Round timing, application duration and reserve price.
+    :param seed: Seed for the random generator.
+    :param chunk_size: Number of auctions that are simulated at once.
+    :return:
+        SimulationReport with the aggregated outcome.
+    """
+    if number_of_auctions < 1:
+        raise ValueError(f'At least one auction needs to be simulated, got {number_of_auctions}')
+    if chunk_size < 1:
+        raise ValueError(f'The chunk size needs to be at least 1, got {chunk_size}')
+
+    population = population or BidderPopulation()
+    latency = latency or LatencyDistribution()
+    timing = timing or RoundTiming()
+
+    rng = np.random.default_rng(seed)
+
+    chunks = []
+    remaining_auctions = number_of_auctions
+    while remaining_auctions > 0:
+        current_chunk_size = min(chunk_size, remaining_auctions)
+        chunks.append(_simulate_chunk(rng=rng,
+                                      number_of_auctions=current_chunk_size,
+                                      population=population,
+                                      latency=latency,
+                                      timing=timing))
+        remaining_auctions -= current_chunk_size
+
+    return SimulationReport(number_of_auctions=number_of_auctions,
+                            prices=np.concatenate([chunk['prices'] for chunk in chunks]),
+                            contention_losses=np.concatenate([chunk['contention_losses'] for chunk in chunks]),
+                            ideal_prices=np.concatenate([chunk['ideal_prices'] for chunk in chunks]),
+                            submitted_groups=sum(chunk['submitted_groups'] for chunk in chunks),
+                            confirmed_groups=sum(chunk['confirmed_groups'] for chunk in chunks),
+                            outbid_failed_groups=sum(chunk['outbid_failed_groups'] for chunk in chunks),
+                            late_failed_groups=sum(chunk['late_failed_groups'] for chunk in chunks),
+                            refunded_amount=sum(chunk['refunded_amount'] for chunk in chunks))
@@ -0,0 +1,223 @@
+import base64
+import mmap
+import os
+import struct
+from multiprocessing import Pool
+from typing import List
+
+from algosdk import constants, encoding
+from algosdk.future import transaction as algo_txn
+from algosdk.v2client import algod
+from nacl.signing import SigningKey
+
+import src.app_utils.blockchain_utils as blockchain_utils
+from src.app_utils.keyring import Keyring
+
+ACCOUNTS_FILE_MAGIC = b'ASAK'
+ACCOUNTS_FILE_VERSION = 1
+ACCOUNTS_FILE_HEADER = struct.Struct('<4sBI')
+ACCOUNT_KEY_SIZE = 2 * constants.key_len_bytes
+MAX_GROUP_SIZE = 16
+
+
+def _generate_raw_keys(count: int) -> bytes:
+    raw_keys = bytearray()
+    for _ in range(count):
+        signing_key = SigningKey.generate()
+        raw_keys += signing_key.encode() + signing_key.verify_key.encode()
+    return bytes(raw_keys)
+
+
+def generate_raw_keys(count: int, workers: int = None) -> bytes:
+    """
+    Generates count accounts in parallel.
+    :param count: Number of accounts.
+    :param workers: Number of processes. Defaults to the number of cores.
+    :return:
+        The concatenated 64 byte private keys, each one is the 32 byte seed followed by the 32 byte public key, the same
+        layout that algosdk encodes in base64.
+    """
+    workers = workers or os.cpu_count() or 1
+    chunk_sizes = [count // workers + (1 if i < count % workers else 0) for i in range(workers)]
+
+    with Pool(processes=workers) as pool:
+        return b''.join(pool.map(_generate_raw_keys, [chunk_size for chunk_size in chunk_sizes if chunk_size > 0]))
+
+
+def write_accounts_file(path: str, raw_keys: bytes):
+    """
+    Writes the accounts in the binary accounts file format: a header with the magic bytes, the format version and the
+    number of accounts, followed by the 64 byte private keys.
+    :param path: The location of the file.
+    :param raw_keys: The concatenated private keys.
+    :return:
+    """
+    with open(path, 'wb') as file:
+        file.write(ACCOUNTS_FILE_HEADER.pack(ACCOUNTS_FILE_MAGIC, ACCOUNTS_FILE_VERSION,
+                                             len(raw_keys) // ACCOUNT_KEY_SIZE))
+        file.write(raw_keys)
+
+
+def write_accounts_yaml(path: str, raw_keys: bytes, first_developer_id: int = 1):
+    """
+    Writes the accounts as developer_N_credentials entries that can be appended to config.yml.
+    :param path: The location of the file.
+    :param raw_keys: The concatenated private keys.
+    :param first_developer_id: The developer id of the first account.
+    :return:
+    """
+    with open(path, 'w') as file:
+        for i, raw_key in enumerate(_split_raw_keys(raw_keys)):
+            account = AccountsFile.decode_raw_key(raw_key)
+            file.write(f'developer_{first_developer_id + i}_credentials:\n'
+                       f'  private_key: {account[0]}\n'
+                       f'  public_key: {account[1]}\n')
+
+
+def _split_raw_keys(raw_keys: bytes):
+    for offset in range(0, len(raw_keys), ACCOUNT_KEY_SIZE):
+        yield raw_keys[offset:offset + ACCOUNT_KEY_SIZE]
+
+
+class AccountsFile:
+
+    def __init__(self, path: str):
+        """
+        Memory mapped binary accounts file. The accounts are decoded only when they are accessed.
+        :param path: The location of the file.
+        """
+        self.path = path
+
+        with open(path, 'rb') as file:
+            self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.count = ACCOUNTS_FILE_HEADER.unpack_from(self.data, 0)
+        if magic != ACCOUNTS_FILE_MAGIC or version != ACCOUNTS_FILE_VERSION:
+            raise ValueError(f'{path} is not an accounts file')
+
+        if len(self.data) != ACCOUNTS_FILE_HEADER.size + self.count * ACCOUNT_KEY_SIZE:
+            raise ValueError(f'{path} is truncated')
+
+    def __len__(self):
+        return self.count
+
+    def raw_key(self, index: int) -> bytes:
+        if not 0 <= index < self.count:
+            raise IndexError(f'There is no account with index {index} in {self.path}')
+
+        offset = ACCOUNTS_FILE_HEADER.size + index * ACCOUNT_KEY_SIZE
+        return self.data[offset:offset + ACCOUNT_KEY_SIZE]
+
+    def private_key(self, index: int) -> str:
+        """
+        :return:
+            The base64 encoded private key of the account at index.
+        """
+        return self.decode_raw_key(self.raw_key(index))[0]
+
+    def address(self, index: int) -> str:
+        """
+        :return:
+            The address of the account at index. Only the public key half of the private key is read.
+        """
+        return encoding.encode_address(self.raw_key(index)[constants.key_len_bytes:])
+
+    def addresses(self) -> List[str]:
+        return [self.address(index) for index in range(self.count)]
+
+    @staticmethod
+    def decode_raw_key(raw_key: bytes) -> (str, str):
+        """
+        :return:
+            private_key: str
+            public_key: str
+        """
+        return base64.b64encode(raw_key).decode(), encoding.encode_address(raw_key[constants.key_len_bytes:])
+
+
+def _assign_group_ids(transactions: List[algo_txn.Transaction]) -> List[List[algo_txn.Transaction]]:
+    groups = []
+    for offset in range(0, len(transactions), MAX_GROUP_SIZE):
+        group = transactions[offset:offset + MAX_GROUP_SIZE]
+        if len(group) > 1:
+            group_id = algo_txn.calculate_group_id(group)
+            for txn in group:
+                txn.group = group_id
+        groups.append(group)
+    return groups
+
+
+def plan_funding(funder_address: str,
+                 receiver_addresses: List[str],
+                 amount: int,
+                 params: algo_txn.SuggestedParams) -> List[List[algo_txn.Transaction]]:
+    """
+    Plans the payments that fund the accounts, in atomic groups of up to 16 payments from the funder.
+    :param funder_address: The address that pays for all of the accounts.
+    :param receiver_addresses: The addresses of the accounts.
+    :param amount: The amount in microAlgos for every account. It needs to cover the minimum balance of the account
+    with the opted-in ASAs and the fees that the account will pay.
+    :param params: Suggested params for all of the transactions.
+    :return:
+        List of transaction groups.
+    """
+    payments = [algo_txn.PaymentTxn(sender=funder_address,
+                                    sp=params,
+                                    receiver=receiver_address,
+                                    amt=amount)
+                for receiver_address in receiver_addresses]
+
+    return _assign_group_ids(payments)
+
+
+def plan_asa_opt_ins(addresses: List[str],
+                     asa_id: int,
+                     params: algo_txn.SuggestedParams) -> List[List[algo_txn.Transaction]]:
+    """
+    Plans the ASA opt-ins of the accounts, in atomic groups of up to 16 opt-ins. Every opt-in is signed by its own
+    account, so the accounts need to be funded first.
+    :param addresses: The addresses of the accounts.
+    :param asa_id: The ASA to opt in to.
+    :param params: Suggested params for all of the transactions.
+    :return:
+        List of transaction groups.
+    """
+    opt_ins = [algo_txn.AssetTransferTxn(sender=address,
+                                         sp=params,
+                                         receiver=address,
+                                         amt=0,
+                                         index=asa_id)
+               for address in addresses]
+
+    return _assign_group_ids(opt_ins)
+
+
+def execute_groups(client: algod.AlgodClient,
+                   groups: List[List[algo_txn.Transaction]],
+                   keyring: Keyring) -> List[str]:
+    """
+    Signs and submits all of the groups before waiting for any confirmation, so the groups are confirmed together in
+    the next rounds instead of one after another. Every sender is looked up before the first group is submitted.
+    :param client: algorand client
+    :param groups: The planned transaction groups.
+    :param keyring: Keyring with the accounts of all of the senders.
+    :return:
+        The txid of the first transaction of every group.
+    """
+    accounts = {}
+    for group in groups:
+        for txn in group:
+            if txn.sender not in accounts:
+                accounts[txn.sender] = keyring.get_by_address(txn.sender)
+                if accounts[txn.sender] is None:
+                    raise ValueError(f'There is no account with address {txn.sender} in the keyring')
+
+    txids = []
+    for group in groups:
+        signed_group = [accounts[txn.sender].sign(txn) for txn in group]
+        txids.append(blockchain_utils.send_transactions(client=client, signed_txns=signed_group))
+
+    for txid in txids:
+        blockchain_utils.wait_for_confirmation(client, txid)
+
+    return txids
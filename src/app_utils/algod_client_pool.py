@@ -0,0 +1,179 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import List
+
+from algosdk import error as algo_error
+from algosdk.v2client import algod
+
+from src.app_utils.submission_tracker import is_transient_error
+
+
+class NodeHealth:
+
+    def __init__(self, client: algod.AlgodClient):
+        """
+        Latency, freshness and failures of a single algod node in the pool.
+        :param client: The client of the node.
+        """
+        self.client = client
+        self.latency = None
+        self.last_round = 0
+        self.unhealthy_until = 0.0
+
+
+class AlgodClientPool(algod.AlgodClient):
+
+    def __init__(self,
+                 clients: List[algod.AlgodClient],
+                 submit_fan_out: int = 2,
+                 max_round_lag: int = 2,
+                 latency_smoothing: float = 0.2,
+                 failure_cooldown_seconds: float = 10.0,
+                 refresh_interval_seconds: float = 30.0):
+        """
+        Algod client backed by several algod nodes. Reads go to the fastest healthy node and fail over to the next one
+        on network errors, submissions are sent to several nodes at once and succeed as soon as one node accepts them.
+        A node is unhealthy for failure_cooldown_seconds after a network error, or while its last round is more than
+        max_round_lag rounds behind the freshest node. A node whose latency or round was never measured is not lagging,
+        it is preferred by the reads so it gets measured on first use. The status of every node is requested again in
+        the background when the last refresh is older than refresh_interval_seconds.
+        :param clients: The clients of the nodes.
+        :param submit_fan_out: To how many nodes a submission is sent.
+        :param max_round_lag: How many rounds a node can be behind the freshest node and still be used for reads.
+        :param latency_smoothing: Weight of the latest request in the moving average of the latency of a node.
+        :param failure_cooldown_seconds: For how long a node is skipped after a network error.
+        :param refresh_interval_seconds: How old the status of the nodes can get before it is requested again.
+        """
+        if len(clients) == 0:
+            raise ValueError('The pool needs at least one algod client')
+
+        super().__init__(clients[0].algod_token, clients[0].algod_address, clients[0].headers)
+
+        self.nodes = [NodeHealth(client=client) for client in clients]
+        self.submit_fan_out = submit_fan_out
+        self.max_round_lag = max_round_lag
+        self.latency_smoothing = latency_smoothing
+        self.failure_cooldown_seconds = failure_cooldown_seconds
+        self.refresh_interval_seconds = refresh_interval_seconds
+
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=len(clients))
+        self.refreshed_at = None
+        self.is_refreshing = False
+
+    def ranked_nodes(self) -> List[NodeHealth]:
+        """
+        :return:
+            The nodes ordered by preference: the healthy and fresh nodes by latency first, nodes without any latency
+            measurement before the measured ones so they are probed, and the unhealthy or lagging nodes last. A node
+            whose round is not known yet is not lagging.
+        """
+        now = time.monotonic()
+        with self.lock:
+            freshest_round = max(node.last_round for node in self.nodes)
+
+            def preference(node: NodeHealth):
+                is_fresh = node.last_round == 0 or node.last_round >= freshest_round - self.max_round_lag
+                is_healthy = node.unhealthy_until <= now and is_fresh
+                return not is_healthy, node.latency if node.latency is not None else 0.0
+
+            return sorted(self.nodes, key=preference)
+
+    def refresh(self):
+        """
+        Requests the status of every node concurrently to update their latency and last round.
+        :return:
+        """
+        with self.lock:
+            self.refreshed_at = time.monotonic()
+
+        futures = [self.executor.submit(self._node_request, node, "GET", "/status", None, None, None, "json")
+                   for node in self.nodes]
+        wait(futures)
+
+    def _refresh_in_background_if_stale(self):
+        with self.lock:
+            is_stale = self.refreshed_at is not None and \
+                time.monotonic() - self.refreshed_at > self.refresh_interval_seconds
+            if self.refreshed_at is None:
+                # The first requests probe the nodes that were never measured, the refreshes start after them.
+                self.refreshed_at = time.monotonic()
+            if not is_stale or self.is_refreshing:
+                return
+            self.is_refreshing = True
+
+        def refresh():
+            try:
+                self.refresh()
+            finally:
+                with self.lock:
+                    self.is_refreshing = False
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def algod_request(self, method, requrl, params=None, data=None, headers=None, response_format="json"):
+        if method == "POST" and requrl.startswith("/transactions"):
+            return self._fan_out_request(method, requrl, params, data, headers, response_format)
+
+        self._refresh_in_background_if_stale()
+
+        last_error = None
+        for node in self.ranked_nodes():
+            try:
+                return self._node_request(node, method, requrl, params, data, headers, response_format)
+            except Exception as e:
+                # A transaction that has just been submitted might not have reached every node yet
+                is_not_found = isinstance(e, algo_error.AlgodHTTPError) and e.code == 404
+                if not (is_transient_error(e) or is_not_found):
+                    raise
+                last_error = e
+
+        raise last_error
+
+    def _fan_out_request(self, method, requrl, params, data, headers, response_format):
+        nodes = self.ranked_nodes()[:max(self.submit_fan_out, 1)]
+        pending = {self.executor.submit(self._node_request, node, method, requrl, params, data, headers,
+                                        response_format)
+                   for node in nodes}
+
+        errors = []
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                errors.append(future.exception())
+
+        # Prefer the answer of a node over a network error, e.g. a logic rejection of the group
+        for e in errors:
+            if not is_transient_error(e):
+                raise e
+        raise errors[0]
+
+    def _node_request(self, node: NodeHealth, method, requrl, params, data, headers, response_format):
+        started_at = time.monotonic()
+        try:
+            response = node.client.algod_request(method, requrl, params=params, data=data, headers=headers,
+                                                 response_format=response_format)
+        except Exception as e:
+            if is_transient_error(e):
+                with self.lock:
+                    node.unhealthy_until = time.monotonic() + self.failure_cooldown_seconds
+            raise
+
+        latency = time.monotonic() - started_at
+        # Waiting for a block is a long poll, its duration says nothing about the node
+        is_long_poll = requrl.startswith("/status/wait-for-block-after")
+
+        with self.lock:
+            if not is_long_poll:
+                if node.latency is None:
+                    node.latency = latency
+                else:
+                    node.latency += self.latency_smoothing * (latency - node.latency)
+
+            if isinstance(response, dict) and 'last-round' in response:
+                node.last_round = max(node.last_round, response['last-round'])
+
+        return response
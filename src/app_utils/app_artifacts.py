@@ -0,0 +1,96 @@
+import base64
+import json
+
+from algosdk import logic as algo_logic
+from algosdk.v2client import algod
+
+
+class AppArtifact:
+
+    def __init__(self,
+                 app_id: int,
+                 asa_id: int,
+                 teal_version: int,
+                 approval_program_hash: str,
+                 asa_delegate_authority_code_bytes: bytes,
+                 algo_delegate_authority_code_bytes: bytes,
+                 fee_pooling: bool = False):
+        """
+        Everything that a bidder needs to interact with a deployed bidding application, without compiling any TEAL.
+        :param app_id: The id of the bidding application.
+        :param asa_id: The id of the NFT.
+        :param teal_version: The teal version of the programs.
+        :param approval_program_hash: The hash of the compiled approval program, in address form.
+        :param asa_delegate_authority_code_bytes: The compiled ASA delegate authority.
+        :param algo_delegate_authority_code_bytes: The compiled ALGO delegate authority.
+        :param fee_pooling: Whether the programs were compiled for fee pooled groups.
+        """
+        self.app_id = app_id
+        self.asa_id = asa_id
+        self.teal_version = teal_version
+        self.approval_program_hash = approval_program_hash
+        self.asa_delegate_authority_code_bytes = asa_delegate_authority_code_bytes
+        self.algo_delegate_authority_code_bytes = algo_delegate_authority_code_bytes
+        self.fee_pooling = fee_pooling
+
+        self.asa_delegate_authority_address = algo_logic.address(asa_delegate_authority_code_bytes)
+        self.algo_delegate_authority_address = algo_logic.address(algo_delegate_authority_code_bytes)
+
+    def save(self, path: str):
+        """
+        Writes the artifact as a compact JSON file.
+        :param path: The location of the file.
+        :return:
+        """
+        artifact = {
+            'app_id': self.app_id,
+            'asa_id': self.asa_id,
+            'teal_version': self.teal_version,
+            'approval_program_hash': self.approval_program_hash,
+            'asa_delegate_authority_code': base64.b64encode(self.asa_delegate_authority_code_bytes).decode(),
+            'algo_delegate_authority_code': base64.b64encode(self.algo_delegate_authority_code_bytes).decode(),
+            'asa_delegate_authority_address': self.asa_delegate_authority_address,
+            'algo_delegate_authority_address': self.algo_delegate_authority_address,
+            'fee_pooling': self.fee_pooling,
+        }
+
+        with open(path, 'w') as file:
+            json.dump(artifact, file, separators=(',', ':'))
+
+    @classmethod
+    def load(cls, path: str):
+        """
+        Reads an artifact that was written with save. The delegate addresses are derived again from the bytecode and
+        compared with the stored ones, so a corrupted file is detected before any transaction is signed.
+        :param path: The location of the file.
+        :return:
+            AppArtifact
+        """
+        with open(path) as file:
+            artifact = json.load(file)
+
+        app_artifact = cls(app_id=artifact['app_id'],
+                           asa_id=artifact['asa_id'],
+                           teal_version=artifact['teal_version'],
+                           approval_program_hash=artifact['approval_program_hash'],
+                           asa_delegate_authority_code_bytes=base64.b64decode(artifact['asa_delegate_authority_code']),
+                           algo_delegate_authority_code_bytes=base64.b64decode(artifact['algo_delegate_authority_code']),
+                           fee_pooling=artifact.get('fee_pooling', False))
+
+        if app_artifact.asa_delegate_authority_address != artifact['asa_delegate_authority_address']:
+            raise ValueError('The asa delegate authority code does not match its address')
+        if app_artifact.algo_delegate_authority_address != artifact['algo_delegate_authority_address']:
+            raise ValueError('The algo delegate authority code does not match its address')
+
+        return app_artifact
+
+    def verify_approval_program(self, client: algod.AlgodClient) -> bool:
+        """
+        Checks that the application on the network runs the approval program from which the artifact was created.
+        :param client: algorand client
+        :return:
+        """
+        application_info = client.application_info(self.app_id)
+        approval_program_bytes = base64.b64decode(application_info['params']['approval-program'])
+
+        return algo_logic.address(approval_program_bytes) == self.approval_program_hash
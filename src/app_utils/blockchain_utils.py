@@ -1,8 +1,15 @@
 import base64
 from algosdk.v2client import algod
+from algosdk import error as algo_error
 from algosdk.future import transaction as algo_txn
 from typing import List, Any, Optional
-from algosdk import account as algo_acc
+from src.app_utils.submission_tracker import SubmissionLedger
+from src.app_utils.keyring import address_from_private_key, sign_transaction
+
+submission_ledger = SubmissionLedger()
+
+# The minimum balance of an account without any assets or applications, in microAlgos.
+MIN_ACCOUNT_BALANCE = 100000
 
 
 def wait_for_confirmation(client, txid):
@@ -33,6 +40,18 @@ def compile_program(client: algod.AlgodClient, source_code):
     return base64.b64decode(compile_response['result'])
 
 
+def send_transactions(client: algod.AlgodClient, signed_txns: List[Any]) -> str:
+    """
+    Submits signed transactions through the submission ledger, so a submission that times out is resubmitted with the
+    identical bytes only while its validity window is open.
+    :param client: algorand client
+    :param signed_txns: the signed transactions, more than one transaction must already be grouped.
+    :return:
+        The txid of the first transaction.
+    """
+    return submission_ledger.submit(client=client, signed_txns=signed_txns)
+
+
 def get_default_suggested_params(client: algod.AlgodClient):
     """
     Gets default suggested params with flat transaction fee and fee amount of 1000.
@@ -47,6 +66,71 @@ def get_default_suggested_params(client: algod.AlgodClient):
     return suggested_params
 
 
+def pool_fees(transactions: List[algo_txn.Transaction], payer_index: int = 0):
+    """
+    Moves the fees of all of the transactions in a group to one of them, the others carry no fee. The fees are set on
+    the transactions because algosdk raises a flat fee in the suggested params to the minimum fee. Needs to be called
+    before the group id is calculated.
+    :param transactions: the transactions of the group
+    :param payer_index: the index of the transaction that pays the fees of the group
+    :return:
+    """
+    total_fee = sum(txn.fee for txn in transactions)
+
+    for txn in transactions:
+        txn.fee = 0
+
+    transactions[payer_index].fee = total_fee
+
+
+def get_application_global_state(client: algod.AlgodClient, app_id: int) -> dict:
+    """
+    Reads the global state of an application.
+    :param client: algorand client
+    :param app_id: the application id
+    :return:
+        dict that maps the name of every global variable to its value. Byte slices are returned as bytes and uints as
+        int.
+    """
+    # A client that keeps the global state of the application, like the RoundFeedAlgodClient, serves it without a
+    # request.
+    application_global_state = getattr(client, 'application_global_state', None)
+    if application_global_state is not None:
+        global_state = application_global_state(app_id)
+        if global_state is not None:
+            return global_state
+
+    application_info = client.application_info(app_id)
+
+    global_state = {}
+    for state_variable in application_info['params'].get('global-state', []):
+        key = base64.b64decode(state_variable['key']).decode('utf-8')
+        value = state_variable['value']
+
+        if value['type'] == 1:
+            global_state[key] = base64.b64decode(value['bytes'])
+        else:
+            global_state[key] = value['uint']
+
+    return global_state
+
+
+def is_logic_rejection(e: Exception) -> bool:
+    """
+    Checks whether a submission failed because a smart contract or a smart signature in the group rejected it, as
+    opposed to a network or a malformed transaction error.
+    :param e: the exception raised by the algod client
+    :return:
+    """
+    if not isinstance(e, algo_error.AlgodHTTPError):
+        return False
+
+    message = str(e)
+    return ('rejected by logic' in message or
+            'logic eval error' in message or
+            'rejected by ApprovalProgram' in message)
+
+
 def create_application(client: algod.AlgodClient,
                        creator_private_key: str,
                        approval_program: bytes,
@@ -65,7 +149,7 @@ def create_application(client: algod.AlgodClient,
     :return:
         str: If the creation is successful the app's id is returned.
     """
-    creator_address = algo_acc.address_from_private_key(private_key=creator_private_key)
+    creator_address = address_from_private_key(creator_private_key)
     suggested_params = get_default_suggested_params(client=client)
 
     txn = algo_txn.ApplicationCreateTxn(sender=creator_address,
@@ -77,10 +161,10 @@ def create_application(client: algod.AlgodClient,
                                         local_schema=local_schema,
                                         app_args=app_args)
 
-    signed_txn = txn.sign(private_key=creator_private_key)
+    signed_txn = sign_transaction(txn, creator_private_key)
     tx_id = signed_txn.transaction.get_txid()
 
-    client.send_transaction(signed_txn)
+    send_transactions(client=client, signed_txns=[signed_txn])
 
     wait_for_confirmation(client, tx_id)
 
@@ -106,7 +190,7 @@ def call_application(client: algod.AlgodClient,
     :return:
     """
 
-    caller_address = algo_acc.address_from_private_key(private_key=caller_private_key)
+    caller_address = address_from_private_key(caller_private_key)
     suggested_params = get_default_suggested_params(client=client)
 
     txn = algo_txn.ApplicationCallTxn(sender=caller_address,
@@ -115,10 +199,10 @@ def call_application(client: algod.AlgodClient,
                                       app_args=app_args,
                                       on_complete=on_comlete)
 
-    txn_signed = txn.sign(private_key=caller_private_key)
+    txn_signed = sign_transaction(txn, caller_private_key)
     tx_id = txn_signed.transaction.get_txid()
 
-    client.send_transaction(txn_signed)
+    send_transactions(client=client, signed_txns=[txn_signed])
 
     wait_for_confirmation(client, tx_id)
 
@@ -156,7 +240,7 @@ def create_algorand_standard_asset(client: algod.AlgodClient,
     """
     suggested_params = get_default_suggested_params(client=client)
 
-    creator_address = algo_acc.address_from_private_key(private_key=creator_private_key)
+    creator_address = address_from_private_key(creator_private_key)
 
     txn = algo_txn.AssetConfigTxn(sender=creator_address,
                                   sp=suggested_params,
@@ -171,9 +255,9 @@ def create_algorand_standard_asset(client: algod.AlgodClient,
                                   url=url,
                                   decimals=decimals)
 
-    txn_signed = txn.sign(private_key=creator_private_key)
+    txn_signed = sign_transaction(txn, creator_private_key)
 
-    txid = client.send_transaction(txn_signed)
+    txid = send_transactions(client=client, signed_txns=[txn_signed])
 
     # Wait for the transaction to be confirmed
     wait_for_confirmation(client, txid)
@@ -198,7 +282,7 @@ def asa_opt_in(client: algod.AlgodClient,
     :return:
     """
     suggested_params = get_default_suggested_params(client=client)
-    sender_address = algo_acc.address_from_private_key(sender_private_key)
+    sender_address = address_from_private_key(sender_private_key)
 
     txn = algo_txn.AssetTransferTxn(sender=sender_address,
                                     sp=suggested_params,
@@ -206,8 +290,41 @@ def asa_opt_in(client: algod.AlgodClient,
                                     amt=0,
                                     index=asa_id)
 
-    txn_signed = txn.sign(sender_private_key)
-    txid = client.send_transaction(txn_signed)
+    txn_signed = sign_transaction(txn, sender_private_key)
+    txid = send_transactions(client=client, signed_txns=[txn_signed])
+
+    wait_for_confirmation(client=client, txid=txid)
+
+    return txid
+
+
+def asa_opt_ins(client: algod.AlgodClient,
+                sender_private_key: str,
+                asa_ids: List[int]) -> Optional[str]:
+    """
+    Opts in to up to 16 algorand standard assets with a single Atomic transfer.
+    :param client:
+    :param sender_private_key:
+    :param asa_ids:
+    :return:
+    """
+    suggested_params = get_default_suggested_params(client=client)
+    sender_address = address_from_private_key(sender_private_key)
+
+    txns = [algo_txn.AssetTransferTxn(sender=sender_address,
+                                      sp=suggested_params,
+                                      receiver=sender_address,
+                                      amt=0,
+                                      index=asa_id)
+            for asa_id in asa_ids]
+
+    if len(txns) > 1:
+        gid = algo_txn.calculate_group_id(txns)
+        for txn in txns:
+            txn.group = gid
+
+    txns_signed = [sign_transaction(txn, sender_private_key) for txn in txns]
+    txid = send_transactions(client=client, signed_txns=txns_signed)
 
     wait_for_confirmation(client=client, txid=txid)
 
@@ -223,7 +340,7 @@ def change_asa_management(client: algod.AlgodClient,
                           clawback_address: Optional[str] = None):
     params = get_default_suggested_params(client=client)
 
-    current_manager_address = algo_acc.address_from_private_key(private_key=current_manager_pk)
+    current_manager_address = address_from_private_key(current_manager_pk)
 
     txn = algo_txn.AssetConfigTxn(
         sender=current_manager_address,
@@ -236,8 +353,8 @@ def change_asa_management(client: algod.AlgodClient,
         strict_empty_address_check=False)
 
     # sign by the current manager - Account 2
-    stxn = txn.sign(current_manager_pk)
-    txid = client.send_transaction(stxn)
+    stxn = sign_transaction(txn, current_manager_pk)
+    txid = send_transactions(client=client, signed_txns=[stxn])
 
     wait_for_confirmation(client=client, txid=txid)
 
@@ -256,16 +373,16 @@ def execute_payment(client: algod.AlgodClient,
     """
     suggested_params = get_default_suggested_params(client=client)
 
-    sender_address = algo_acc.address_from_private_key(private_key=sender_private_key)
+    sender_address = address_from_private_key(sender_private_key)
 
     txn = algo_txn.PaymentTxn(sender=sender_address,
                               sp=suggested_params,
                               receiver=reciever_address,
                               amt=amount)
 
-    txn_signed = txn.sign(sender_private_key)
+    txn_signed = sign_transaction(txn, sender_private_key)
 
-    txid = client.send_transaction(txn_signed)
+    txid = send_transactions(client=client, signed_txns=[txn_signed])
 
     wait_for_confirmation(client, txid)
 
@@ -1,44 +1,145 @@
 from algosdk.v2client import algod
-import yaml
+from src.app_utils.rate_limited_client import RateLimitedAlgodClient
+from src.app_utils.pooled_client import PooledAlgodClient
+from src.app_utils.recording_client import RecordingAlgodClient, ReplayAlgodClient, ReplayTiming
+from src.app_utils.algod_client_pool import AlgodClientPool
+from src.app_utils.keyring import Keyring
+from src.app_utils.account_factory import AccountsFile
+from functools import lru_cache
 import os
 from pathlib import Path
 
 
+def _project_root():
+    return Path(os.path.dirname(__file__)).parent.parent
+
+
+@lru_cache(maxsize=None)
 def load_config():
-    path = Path(os.path.dirname(__file__))
-    config_location = os.path.join(path.parent.parent, "config.yml")
+    """
+    Parses config.yml once per process.
+    :return:
+    """
+    import yaml
+
+    config_location = os.path.join(_project_root(), "config.yml")
 
     with open(config_location) as file:
         return yaml.full_load(file)
 
 
-def get_client():
+def _create_node_client(node_credentials: dict, rate_limits: dict = None, persistent_connections: bool = False):
+    token = node_credentials.get('token')
+    address = node_credentials.get('address')
+    purestake_token = {'X-Api-key': token}
+
+    algod_client = algod.AlgodClient(token, address, headers=purestake_token)
+
+    if persistent_connections:
+        algod_client = PooledAlgodClient(client=algod_client)
+
+    if rate_limits is not None:
+        algod_client = RateLimitedAlgodClient(client=algod_client,
+                                              reads_per_second=rate_limits.get('reads', 10),
+                                              compiles_per_second=rate_limits.get('compile', 2),
+                                              submits_per_second=rate_limits.get('submit', 5))
+
+    return algod_client
+
+
+def get_client(round_feed: bool = True):
     """
+    If the client_credentials contain a rate_limits section with reads, compile and submit requests per second, the
+    client is wrapped in a RateLimitedAlgodClient. If the client_credentials contain a list of nodes, each with its own
+    token and address, an AlgodClientPool over all of the nodes is returned. With persistent_connections set, every
+    thread reuses its own connection to every node. A trace section with a path and the mode record wraps the client in a
+    RecordingAlgodClient, while the mode replay returns a ReplayAlgodClient that serves the recorded trace. A round_feed
+    section with the name of the shared memory segment of a running round-feed.py wraps the client in a
+    RoundFeedAlgodClient, which serves the status, the suggested params and the published applications from it.
+    :param round_feed: If False the round_feed section is ignored, the publisher of the feed uses the node directly.
     :return:
         Returns algod_client
     """
-    config = load_config()
+    client_credentials = load_config().get('client_credentials')
 
-    token = config.get('client_credentials').get('token')
-    address = config.get('client_credentials').get('address')
-    purestake_token = {'X-Api-key': token}
+    if client_credentials.get('trace') is not None:
+        algod_client = _get_traced_client()
+    else:
+        algod_client = _create_client(client_credentials)
+
+    round_feed_config = client_credentials.get('round_feed')
+    if round_feed and round_feed_config is not None:
+        from src.app_services.round_feed import RoundFeedAlgodClient, RoundFeedReader
+
+        algod_client = RoundFeedAlgodClient(client=algod_client,
+                                            reader=RoundFeedReader(name=round_feed_config.get('name')),
+                                            max_age=round_feed_config.get('max_age', 30))
 
-    algod_client = algod.AlgodClient(token, address, headers=purestake_token)
     return algod_client
 
 
+@lru_cache(maxsize=None)
+def _get_traced_client():
+    # All of the services share one traced client, so they record to and replay from the same trace.
+    client_credentials = load_config().get('client_credentials')
+    trace = client_credentials.get('trace')
+    trace_path = os.path.join(_project_root(), trace.get('path'))
+
+    if trace.get('mode') == 'replay':
+        return ReplayAlgodClient(trace_path=trace_path, timing=trace.get('timing', ReplayTiming.original))
+    if trace.get('mode') == 'record':
+        return RecordingAlgodClient(client=_create_client(client_credentials), trace_path=trace_path)
+
+    raise ValueError(f"Unknown trace mode {trace.get('mode')}")
+
+
+def _create_client(client_credentials: dict):
+    rate_limits = client_credentials.get('rate_limits')
+    nodes = client_credentials.get('nodes')
+    persistent_connections = client_credentials.get('persistent_connections', False)
+
+    if not nodes:
+        return _create_node_client(node_credentials=client_credentials,
+                                   rate_limits=rate_limits,
+                                   persistent_connections=persistent_connections)
+
+    return AlgodClientPool(clients=[_create_node_client(node_credentials=node_credentials,
+                                                        rate_limits=rate_limits,
+                                                        persistent_connections=persistent_connections)
+                                    for node_credentials in nodes],
+                           submit_fan_out=client_credentials.get('submit_fan_out', 2))
+
+
+@lru_cache(maxsize=None)
+def get_keyring() -> Keyring:
+    """
+    If config.yml contains a bidder_accounts section with the path of a binary accounts file, created with
+    create-account.py, its accounts are added to the keyring under the ids that start from first_id. They are decoded
+    only when they are used.
+    :return:
+        Keyring with all of the developer credentials in config.yml.
+    """
+    config = load_config()
+    keyring = Keyring.from_config(config)
+
+    bidder_accounts = config.get('bidder_accounts')
+    if bidder_accounts is not None:
+        accounts_path = os.path.join(_project_root(), bidder_accounts.get('path'))
+        keyring.add_accounts_file(accounts_file=AccountsFile(accounts_path),
+                                  first_id=bidder_accounts.get('first_id', 1))
+
+    return keyring
+
+
 def main_developer_credentials() -> (str, str):
     """
     :return:
         private_key: str
         public_key: str
     """
-    config = load_config()
-
-    private_key = config.get('main_developer_credentials').get('private_key')
-    public_key = config.get('main_developer_credentials').get('public_key')
+    account = get_keyring().get(Keyring.main_account_id)
 
-    return private_key, public_key
+    return account.private_key, account.address
 
 
 def get_developer_credentials(developer_id: int) -> (str, str):
@@ -47,9 +148,6 @@ def get_developer_credentials(developer_id: int) -> (str, str):
             private_key: str
             public_key: str
         """
-    config = load_config()
-
-    private_key = config.get(f'developer_{developer_id}_credentials').get('private_key')
-    public_key = config.get(f'developer_{developer_id}_credentials').get('public_key')
+    account = get_keyring().get(developer_id)
 
-    return private_key, public_key
+    return account.private_key, account.address
@@ -0,0 +1,182 @@
+import base64
+import threading
+from functools import lru_cache
+from typing import Optional
+
+from algosdk import constants, encoding
+from algosdk.future import transaction as algo_txn
+from nacl.signing import SigningKey
+
+
+class KeyringAccount:
+
+    def __init__(self,
+                 account_id,
+                 private_key: str):
+        """
+        An account whose private key has been decoded once into a signing key, with its address precomputed.
+        :param account_id: The id under which the account is stored in the keyring.
+        :param private_key: The base64 encoded private key.
+        """
+        private_key_bytes = base64.b64decode(private_key)
+
+        self.account_id = account_id
+        self.private_key = private_key
+        self.address = encoding.encode_address(private_key_bytes[constants.key_len_bytes:])
+        self.signing_key = SigningKey(private_key_bytes[:constants.key_len_bytes])
+
+    def sign(self, txn: algo_txn.Transaction) -> algo_txn.SignedTransaction:
+        """
+        Signs a transaction like Transaction.sign, without decoding the private key and deriving the address again.
+        :param txn: The transaction to sign.
+        :return:
+            SignedTransaction
+        """
+        to_sign = constants.txid_prefix + base64.b64decode(encoding.msgpack_encode(txn))
+        signature = base64.b64encode(self.signing_key.sign(to_sign).signature).decode()
+
+        authorizing_address = None if txn.sender == self.address else self.address
+        return algo_txn.SignedTransaction(txn, signature, authorizing_address)
+
+
+class Keyring:
+    main_account_id = "main"
+
+    def __init__(self):
+        """
+        Accounts indexed by id and by address.
+        """
+        self.lock = threading.Lock()
+        self.accounts_by_id = {}
+        self.accounts_by_address = {}
+
+        self.accounts_files = []
+        self.accounts_files_ids_by_address = None
+
+    @classmethod
+    def from_config(cls, config: dict):
+        """
+        Creates a keyring with the main_developer_credentials under the id "main" and every developer_N_credentials
+        under the id N.
+        :param config: The parsed config.yml.
+        :return:
+            Keyring
+        """
+        keyring = cls()
+
+        for key, credentials in config.items():
+            if key == 'main_developer_credentials':
+                account_id = cls.main_account_id
+            elif key.startswith('developer_') and key.endswith('_credentials'):
+                account_id = int(key[len('developer_'):-len('_credentials')])
+            else:
+                continue
+
+            keyring.add(account_id=account_id,
+                        private_key=credentials.get('private_key'),
+                        address=credentials.get('public_key'))
+
+        return keyring
+
+    def add(self, account_id, private_key: str, address: str = None) -> KeyringAccount:
+        """
+        Adds an account to the keyring.
+        :param account_id: The id of the account.
+        :param private_key: The base64 encoded private key.
+        :param address: The expected address of the account. If provided it needs to match the private key.
+        :return:
+            KeyringAccount
+        """
+        account = KeyringAccount(account_id=account_id, private_key=private_key)
+        if address is not None and address != account.address:
+            raise ValueError(f'The private key of account {account_id} does not belong to {address}')
+
+        with self.lock:
+            self.accounts_by_id[account_id] = account
+            self.accounts_by_address[account.address] = account
+
+        return account
+
+    def add_accounts_file(self, accounts_file, first_id: int):
+        """
+        Adds the accounts of a binary accounts file without decoding them. The account at index i of the file gets the
+        id first_id + i and is decoded the first time it is requested.
+        :param accounts_file: AccountsFile
+        :param first_id: The id of the first account in the file.
+        :return:
+        """
+        with self.lock:
+            self.accounts_files.append((first_id, accounts_file))
+            self.accounts_files_ids_by_address = None
+
+    def get(self, account_id) -> KeyringAccount:
+        """
+        :param account_id: The id of the account.
+        :return:
+            KeyringAccount
+        """
+        account = self.accounts_by_id.get(account_id)
+        if account is not None:
+            return account
+
+        for first_id, accounts_file in self.accounts_files:
+            if isinstance(account_id, int) and first_id <= account_id < first_id + len(accounts_file):
+                return self.add(account_id=account_id,
+                                private_key=accounts_file.private_key(account_id - first_id))
+
+        raise ValueError(f'There is no account with id {account_id} in the keyring')
+
+    def get_by_address(self, address: str) -> Optional[KeyringAccount]:
+        """
+        The first lookup of an address that has not been decoded yet indexes the addresses of the accounts files.
+        :param address: The address of the account.
+        :return:
+            The KeyringAccount or None if the address is not in the keyring.
+        """
+        account = self.accounts_by_address.get(address)
+        if account is not None or not self.accounts_files:
+            return account
+
+        if self.accounts_files_ids_by_address is None:
+            ids_by_address = {}
+            for first_id, accounts_file in self.accounts_files:
+                for index, account_address in enumerate(accounts_file.addresses()):
+                    ids_by_address[account_address] = first_id + index
+            self.accounts_files_ids_by_address = ids_by_address
+
+        account_id = self.accounts_files_ids_by_address.get(address)
+        return self.get(account_id) if account_id is not None else None
+
+    def __len__(self):
+        return len(self.accounts_by_id) + sum(len(accounts_file) for _, accounts_file in self.accounts_files)
+
+
+@lru_cache(maxsize=65536)
+def account_from_private_key(private_key: str) -> KeyringAccount:
+    """
+    :param private_key: The base64 encoded private key.
+    :return:
+        The KeyringAccount of the private key, decoded only on the first call for every key.
+    """
+    return KeyringAccount(account_id=None, private_key=private_key)
+
+
+def address_from_private_key(private_key: str) -> str:
+    """
+    Cached replacement of algosdk.account.address_from_private_key.
+    :param private_key: The base64 encoded private key.
+    :return:
+        The address of the account.
+    """
+    return account_from_private_key(private_key).address
+
+
+def sign_transaction(txn: algo_txn.Transaction, private_key: str) -> algo_txn.SignedTransaction:
+    """
+    Cached replacement of Transaction.sign.
+    :param txn: The transaction to sign.
+    :param private_key: The base64 encoded private key.
+    :return:
+        SignedTransaction
+    """
+    return account_from_private_key(private_key).sign(txn)
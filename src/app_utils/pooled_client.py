@@ -0,0 +1,88 @@
+import http.client
+import json
+import threading
+from urllib import parse
+
+from algosdk import constants
+from algosdk import error as algo_error
+from algosdk.v2client import algod
+
+
+class PooledAlgodClient(algod.AlgodClient):
+
+    def __init__(self,
+                 client: algod.AlgodClient,
+                 timeout: float = None):
+        """
+        Algod client that keeps one persistent HTTP connection per thread instead of opening a new connection for
+        every request, which saves the TCP and TLS handshakes when many requests are sent concurrently.
+        :param client: The client whose token, address and headers are used.
+        :param timeout: Socket timeout in seconds. None waits forever, which is needed for the long poll of
+        status_after_block.
+        """
+        super().__init__(client.algod_token, client.algod_address, client.headers)
+        self.timeout = timeout
+
+        address = parse.urlsplit(client.algod_address)
+        self.connection_class = http.client.HTTPSConnection if address.scheme == "https" else http.client.HTTPConnection
+        self.host = address.netloc
+        self.base_path = address.path.rstrip("/")
+
+        self.local = threading.local()
+
+    def algod_request(self, method, requrl, params=None, data=None, headers=None, response_format="json"):
+        header = {}
+
+        if self.headers:
+            header.update(self.headers)
+
+        if headers:
+            header.update(headers)
+
+        if requrl not in constants.no_auth:
+            header.update({
+                constants.algod_auth_header: self.algod_token
+            })
+
+        if requrl not in constants.unversioned_paths:
+            requrl = algod.api_version_path_prefix + requrl
+        if params:
+            requrl = requrl + "?" + parse.urlencode(params)
+
+        status, body = self._send(method, self.base_path + requrl, data, header)
+
+        if status >= 400:
+            body = body.decode("utf-8")
+            try:
+                message = json.loads(body)["message"]
+            except (ValueError, KeyError, TypeError):
+                message = body
+            raise algo_error.AlgodHTTPError(message, status)
+
+        if response_format == "json":
+            try:
+                return json.loads(body)
+            except json.JSONDecodeError:
+                return None
+        else:
+            return body
+
+    def _send(self, method, url, data, header):
+        # A connection that was reused can be closed by the server at any time, in that case the request is sent once
+        # more over a new connection. Requests sent over a new connection are never retried.
+        while True:
+            connection = getattr(self.local, "connection", None)
+            is_new_connection = connection is None
+            if is_new_connection:
+                connection = self.connection_class(self.host, timeout=self.timeout)
+                self.local.connection = connection
+
+            try:
+                connection.request(method, url, body=data, headers=header)
+                response = connection.getresponse()
+                return response.status, response.read()
+            except (http.client.HTTPException, OSError) as e:
+                connection.close()
+                self.local.connection = None
+                if is_new_connection or not isinstance(e, (http.client.HTTPException, ConnectionError)):
+                    raise
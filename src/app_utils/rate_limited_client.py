@@ -0,0 +1,171 @@
+import copy
+import threading
+import time
+
+from algosdk import error as algo_error
+from algosdk.v2client import algod
+
+
+class EndpointClass:
+    """
+    The endpoint classes that hosted algod providers put separate quotas on.
+    """
+    reads = "reads"
+    compile = "compile"
+    submit = "submit"
+
+
+def get_endpoint_class(method: str, requrl: str) -> str:
+    """
+    :param method: request method
+    :param requrl: url of the request relative to the algod address
+    :return:
+        The EndpointClass of the request.
+    """
+    if requrl.startswith("/teal/compile"):
+        return EndpointClass.compile
+    if method == "POST" and requrl.startswith("/transactions"):
+        return EndpointClass.submit
+    return EndpointClass.reads
+
+
+class TokenBucket:
+
+    def __init__(self,
+                 rate: float,
+                 capacity: float = None,
+                 min_rate: float = 0.5):
+        """
+        Token bucket with an adaptive rate. Every 429 response halves the rate and every successful request slowly
+        raises it back up to the configured rate.
+        :param rate: Maximum sustained requests per second.
+        :param capacity: Maximum burst size. Defaults to one second worth of requests.
+        :param min_rate: The rate never drops below this value.
+        """
+        self.max_rate = rate
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self.min_rate = min_rate
+
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Blocks until a token is available and takes it.
+        :return:
+        """
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                wait_time = (1 - self.tokens) / self.rate
+
+            time.sleep(wait_time)
+
+    def on_success(self):
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+    def on_throttled(self):
+        with self.lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = 0
+
+
+class _InFlightRequest:
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+
+class RateLimitedAlgodClient(algod.AlgodClient):
+
+    def __init__(self,
+                 client: algod.AlgodClient,
+                 reads_per_second: float = 10,
+                 compiles_per_second: float = 2,
+                 submits_per_second: float = 5,
+                 max_throttled_retries: int = 5,
+                 throttled_backoff_seconds: float = 0.5):
+        """
+        Algod client that stays within the request quotas of a hosted algod provider. Every endpoint class has its own
+        token bucket, identical concurrent GET requests are sent only once and share the response, and 429 responses
+        are retried with an exponential backoff while the rate of the endpoint class is lowered.
+        :param client: The client that executes the requests.
+        :param reads_per_second: The quota for the reads, e.g. status, suggested params and application info.
+        :param compiles_per_second: The quota for the teal compile endpoint.
+        :param submits_per_second: The quota for submitting transactions.
+        :param max_throttled_retries: How many times a request that got a 429 response is retried.
+        :param throttled_backoff_seconds: The base of the exponential backoff after a 429 response.
+        """
+        super().__init__(client.algod_token, client.algod_address, client.headers)
+        self.client = client
+        self.max_throttled_retries = max_throttled_retries
+        self.throttled_backoff_seconds = throttled_backoff_seconds
+
+        self.buckets = {
+            EndpointClass.reads: TokenBucket(rate=reads_per_second),
+            EndpointClass.compile: TokenBucket(rate=compiles_per_second),
+            EndpointClass.submit: TokenBucket(rate=submits_per_second),
+        }
+
+        self.in_flight_lock = threading.Lock()
+        self.in_flight_reads = {}
+
+    def algod_request(self, method, requrl, params=None, data=None, headers=None, response_format="json"):
+        if method != "GET":
+            return self._rate_limited_request(method, requrl, params, data, headers, response_format)
+
+        key = (requrl, tuple(sorted(params.items())) if params else (), response_format)
+
+        with self.in_flight_lock:
+            in_flight_request = self.in_flight_reads.get(key)
+            is_leader = in_flight_request is None
+            if is_leader:
+                in_flight_request = _InFlightRequest()
+                self.in_flight_reads[key] = in_flight_request
+
+        if not is_leader:
+            in_flight_request.done.wait()
+            if in_flight_request.error is not None:
+                raise in_flight_request.error
+            return copy.deepcopy(in_flight_request.response)
+
+        try:
+            in_flight_request.response = self._rate_limited_request(method, requrl, params, data, headers,
+                                                                    response_format)
+            return in_flight_request.response
+        except Exception as e:
+            in_flight_request.error = e
+            raise
+        finally:
+            with self.in_flight_lock:
+                del self.in_flight_reads[key]
+            in_flight_request.done.set()
+
+    def _rate_limited_request(self, method, requrl, params, data, headers, response_format):
+        bucket = self.buckets[get_endpoint_class(method, requrl)]
+
+        for attempt in range(self.max_throttled_retries + 1):
+            bucket.acquire()
+            try:
+                response = self.client.algod_request(method, requrl, params=params, data=data, headers=headers,
+                                                     response_format=response_format)
+            except algo_error.AlgodHTTPError as e:
+                if e.code != 429 or attempt == self.max_throttled_retries:
+                    raise
+                bucket.on_throttled()
+                time.sleep(self.throttled_backoff_seconds * 2 ** attempt)
+            else:
+                bucket.on_success()
+                return response
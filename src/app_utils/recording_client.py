@@ -0,0 +1,144 @@
+import collections
+import threading
+import time
+from urllib import parse
+
+import msgpack
+from algosdk import error as algo_error
+from algosdk.v2client import algod
+
+TRACE_FILE_VERSION = 1
+
+
+class ReplayTiming:
+    """
+    How fast the ReplayAlgodClient serves the recorded responses.
+    """
+    original = "original"
+    max_speed = "max_speed"
+
+
+def _request_url(requrl, params):
+    if params:
+        return requrl + "?" + parse.urlencode(params)
+    return requrl
+
+
+class RecordingAlgodClient(algod.AlgodClient):
+
+    def __init__(self,
+                 client: algod.AlgodClient,
+                 trace_path: str):
+        """
+        Algod client that executes every request with the given client and appends the request, the response and the
+        duration of the request to a trace file that can be served by the ReplayAlgodClient. The trace file is a
+        stream of msgpack maps, the first one holds the address of the node.
+        :param client: The client that executes the requests.
+        :param trace_path: The location of the trace file. An existing file is overwritten.
+        """
+        super().__init__(client.algod_token, client.algod_address, client.headers)
+        self.client = client
+
+        self.lock = threading.Lock()
+        self.started_at = time.perf_counter()
+        self.trace_file = open(trace_path, 'wb')
+        self.packer = msgpack.Packer(use_bin_type=True)
+        self._write({'version': TRACE_FILE_VERSION, 'address': client.algod_address})
+
+    def algod_request(self, method, requrl, params=None, data=None, headers=None, response_format="json"):
+        entry = {
+            'method': method,
+            'url': _request_url(requrl, params),
+            'data': data,
+            'response_format': response_format,
+            'started_at': time.perf_counter() - self.started_at,
+        }
+
+        try:
+            response = self.client.algod_request(method, requrl, params=params, data=data, headers=headers,
+                                                 response_format=response_format)
+        except algo_error.AlgodHTTPError as e:
+            entry['duration'] = time.perf_counter() - self.started_at - entry['started_at']
+            entry['error'] = {'message': str(e), 'code': e.code}
+            self._write(entry)
+            raise
+
+        entry['duration'] = time.perf_counter() - self.started_at - entry['started_at']
+        entry['response'] = response
+        self._write(entry)
+
+        return response
+
+    def _write(self, entry: dict):
+        with self.lock:
+            self.trace_file.write(self.packer.pack(entry))
+            self.trace_file.flush()
+
+    def close(self):
+        with self.lock:
+            self.trace_file.close()
+
+
+class ReplayAlgodClient(algod.AlgodClient):
+
+    def __init__(self,
+                 trace_path: str,
+                 timing: str = ReplayTiming.original):
+        """
+        Algod client that never talks to a node and answers every request with the response that was recorded for the
+        same request by the RecordingAlgodClient, in the recorded order. Requests whose body is different from the
+        recorded one, e.g. transactions with a different note, are matched only by their method and url.
+        :param trace_path: The location of the trace file.
+        :param timing: ReplayTiming.original holds every request back until its recorded start, counted from the first
+        replayed request, and then waits for its recorded duration, so the gaps between the requests are replayed
+        too. ReplayTiming.max_speed answers immediately.
+        """
+        if timing not in (ReplayTiming.original, ReplayTiming.max_speed):
+            raise ValueError(f'Unknown replay timing {timing}')
+
+        with open(trace_path, 'rb') as file:
+            entries = list(msgpack.Unpacker(file, raw=False, strict_map_key=False))
+
+        header = entries[0]
+        if header.get('version') != TRACE_FILE_VERSION:
+            raise ValueError(f'{trace_path} is not a trace file')
+
+        super().__init__("", header['address'])
+        self.timing = timing
+        # The recorded start of the first replayed request is mapped to this moment.
+        self.started_at = None
+
+        self.lock = threading.Lock()
+        self.entries_by_request = collections.defaultdict(collections.deque)
+        self.entries_by_url = collections.defaultdict(collections.deque)
+        self.served_entries = set()
+        for entry in entries[1:]:
+            self.entries_by_request[(entry['method'], entry['url'], entry['data'])].append(entry)
+            self.entries_by_url[(entry['method'], entry['url'])].append(entry)
+
+    def algod_request(self, method, requrl, params=None, data=None, headers=None, response_format="json"):
+        entry = self._take_entry(method, _request_url(requrl, params), data)
+
+        if self.timing == ReplayTiming.original:
+            with self.lock:
+                if self.started_at is None:
+                    self.started_at = time.perf_counter() - entry['started_at']
+            time.sleep(max(0.0, self.started_at + entry['started_at'] - time.perf_counter()))
+            time.sleep(entry['duration'])
+
+        if 'error' in entry:
+            raise algo_error.AlgodHTTPError(entry['error']['message'], entry['error']['code'])
+
+        return entry['response']
+
+    def _take_entry(self, method, url, data) -> dict:
+        # Every entry is in both indexes, the entries that were already served through the other index are skipped.
+        with self.lock:
+            for entries in (self.entries_by_request.get((method, url, data)), self.entries_by_url.get((method, url))):
+                while entries:
+                    entry = entries.popleft()
+                    if id(entry) not in self.served_entries:
+                        self.served_entries.add(id(entry))
+                        return entry
+
+        raise ValueError(f'There is no recorded response left for {method} {url}')
@@ -0,0 +1,260 @@
+import base64
+import http.client
+import socket
+import threading
+import time
+import urllib.error
+from typing import List, Optional
+
+from algosdk import encoding
+from algosdk import error as algo_error
+from algosdk.v2client import algod
+
+
+class SubmissionStatus:
+    """
+    All the possible states of a submitted transaction group.
+    """
+    pending = "pending"
+    confirmed = "confirmed"
+    rejected = "rejected"
+    expired = "expired"
+    unknown = "unknown"
+
+
+class SubmissionRecord:
+
+    def __init__(self,
+                 txid: str,
+                 group_id: Optional[str],
+                 signed_bytes: bytes,
+                 first_valid: int,
+                 last_valid: int):
+        """
+        A signed transaction group that has been handed to the network.
+        :param txid: The id of the first transaction in the group.
+        :param group_id: The base64 encoded group id or None for a single transaction.
+        :param signed_bytes: The msgpack encoded signed transactions, exactly as they were submitted.
+        :param first_valid: The first round in which every transaction of the group is valid.
+        :param last_valid: The last round in which every transaction of the group is valid.
+        """
+        self.txid = txid
+        self.group_id = group_id
+        self.signed_bytes = signed_bytes
+        self.first_valid = first_valid
+        self.last_valid = last_valid
+
+        self.status = SubmissionStatus.unknown
+        self.confirmed_round = None
+        self.submissions = 0
+        self.last_error = None
+        # The reason of the node for dropping the group from its pool, once it is rejected.
+        self.pool_error = None
+
+
+def is_transient_error(e: Exception) -> bool:
+    """
+    Network errors after which we can not know whether the node has received the submission.
+    """
+    if isinstance(e, algo_error.AlgodHTTPError):
+        return e.code is not None and e.code >= 500
+    return isinstance(e, (urllib.error.URLError, socket.timeout, ConnectionError, http.client.HTTPException))
+
+
+def _is_already_submitted_error(e: Exception) -> bool:
+    """
+    The node refuses the identical bytes because it has already seen the transactions.
+    """
+    message = str(e)
+    return isinstance(e, algo_error.AlgodHTTPError) and ('already in ledger' in message or
+                                                         'already in pool' in message)
+
+
+class SubmissionLedger:
+
+    def __init__(self,
+                 max_attempts: int = 5,
+                 backoff_seconds: float = 1.0):
+        """
+        Keeps the signed bytes and the validity window of every submitted transaction group, keyed by the txid of its
+        first transaction and by its group id. When a submission times out the ledger asks the node whether the group
+        has arrived and resubmits the identical bytes only while the validity window is still open. Resubmitting the
+        same bytes can never execute the group twice, because the txids do not change.
+        :param max_attempts: The maximum number of submissions of the same group, at least 1.
+        :param backoff_seconds: The pause between two submissions of the same group.
+        """
+        if max_attempts < 1:
+            raise ValueError(f'The group needs to be submitted at least once, max_attempts is {max_attempts}')
+
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+
+        self.lock = threading.Lock()
+        self.records = {}
+        self.records_by_group_id = {}
+        self.pruned_round = 0
+
+    def record(self, signed_txns: List) -> SubmissionRecord:
+        """
+        Records a signed transaction group without submitting it.
+        :param signed_txns: list of SignedTransaction, LogicSigTransaction or MultisigTransaction objects.
+        :return:
+            The SubmissionRecord of the group.
+        """
+        signed_bytes = b''.join(base64.b64decode(encoding.msgpack_encode(signed_txn)) for signed_txn in signed_txns)
+        transactions = [signed_txn.transaction for signed_txn in signed_txns]
+
+        group = transactions[0].group
+        record = SubmissionRecord(txid=signed_txns[0].get_txid(),
+                                  group_id=base64.b64encode(group).decode() if group else None,
+                                  signed_bytes=signed_bytes,
+                                  first_valid=max(txn.first_valid_round for txn in transactions),
+                                  last_valid=min(txn.last_valid_round for txn in transactions))
+
+        with self.lock:
+            self._prune(current_round=record.first_valid)
+            existing_record = self.records.get(record.txid)
+            if existing_record is not None:
+                return existing_record
+
+            self.records[record.txid] = record
+            if record.group_id is not None:
+                self.records_by_group_id[record.group_id] = record
+
+        return record
+
+    def get(self, txid: str = None, group_id: str = None) -> Optional[SubmissionRecord]:
+        """
+        :return:
+            The SubmissionRecord with the given txid or group id, or None if it was never recorded or already pruned.
+        """
+        with self.lock:
+            if txid is not None:
+                return self.records.get(txid)
+            return self.records_by_group_id.get(group_id)
+
+    def submit(self, client: algod.AlgodClient, signed_txns: List) -> str:
+        """
+        Submits a signed transaction group. If the submission fails because of a network error, the status of the
+        group is checked and the identical bytes are resubmitted while the group is neither pending nor confirmed and
+        its validity window is open.
+        :param client: algorand client
+        :param signed_txns: the signed transaction group
+        :return:
+            The txid of the first transaction in the group.
+        """
+        record = self.record(signed_txns)
+
+        last_error = None
+        for attempt in range(self.max_attempts):
+            if attempt > 0:
+                time.sleep(self.backoff_seconds)
+
+            if self._send(client, record):
+                return record.txid
+            last_error = record.last_error
+
+            try:
+                status = self.status(client, record.txid)
+            except Exception as e:
+                if not is_transient_error(e):
+                    raise
+                continue
+
+            if status in (SubmissionStatus.pending, SubmissionStatus.confirmed):
+                return record.txid
+            if status == SubmissionStatus.rejected:
+                raise algo_error.AlgodHTTPError(record.pool_error, 400)
+            if status == SubmissionStatus.expired:
+                break
+
+        raise last_error
+
+    def resubmit(self, client: algod.AlgodClient, txid: str) -> bool:
+        """
+        Resubmits the identical bytes of a recorded group if its validity window is still open.
+        :param client: algorand client
+        :param txid: the txid of the first transaction in the group
+        :return:
+            True if the node has accepted or already knows the group.
+        """
+        record = self.get(txid=txid)
+        if record is None:
+            raise ValueError(f'The group of {txid} is not recorded or its validity window has closed, '
+                             f'its bytes can not be resubmitted')
+
+        if client.status().get('last-round') >= record.last_valid:
+            record.status = SubmissionStatus.expired
+            return False
+
+        return self._send(client, record)
+
+    def status(self, client: algod.AlgodClient, txid: str) -> str:
+        """
+        Asks the node about a recorded group.
+        :param client: algorand client
+        :param txid: the txid of the first transaction in the group
+        :return:
+            One of the SubmissionStatus values, unknown for a group that is not recorded or was already pruned.
+        """
+        record = self.get(txid=txid)
+        if record is None:
+            return SubmissionStatus.unknown
+
+        if record.status in (SubmissionStatus.confirmed, SubmissionStatus.expired, SubmissionStatus.rejected):
+            return record.status
+
+        try:
+            txinfo = client.pending_transaction_info(txid)
+        except algo_error.AlgodHTTPError as e:
+            if e.code != 404:
+                raise
+            txinfo = None
+
+        if txinfo and txinfo.get('confirmed-round'):
+            record.status = SubmissionStatus.confirmed
+            record.confirmed_round = txinfo.get('confirmed-round')
+        elif txinfo and txinfo.get('pool-error'):
+            record.status = SubmissionStatus.rejected
+            record.pool_error = txinfo.get('pool-error')
+        elif txinfo:
+            record.status = SubmissionStatus.pending
+        elif client.status().get('last-round') >= record.last_valid:
+            record.status = SubmissionStatus.expired
+        else:
+            record.status = SubmissionStatus.unknown
+
+        return record.status
+
+    def _send(self, client: algod.AlgodClient, record: SubmissionRecord) -> bool:
+        record.submissions += 1
+        record.last_error = None
+
+        try:
+            client.send_raw_transaction(base64.b64encode(record.signed_bytes))
+        except Exception as e:
+            if not _is_already_submitted_error(e):
+                if not is_transient_error(e):
+                    raise
+                record.last_error = e
+                return False
+
+        if record.status == SubmissionStatus.unknown:
+            record.status = SubmissionStatus.pending
+        return True
+
+    def _prune(self, current_round: int):
+        """
+        Removes the records whose validity window has closed before current_round, the node can not accept them
+        anymore so there is nothing left to decide about them.
+        """
+        if current_round <= self.pruned_round:
+            return
+        self.pruned_round = current_round
+
+        closed_txids = [txid for txid, record in self.records.items() if record.last_valid < current_round]
+
+        for txid in closed_txids:
+            record = self.records.pop(txid)
+            if record.group_id is not None:
+                self.records_by_group_id.pop(record.group_id, None)